@@ -0,0 +1,237 @@
+
+import asyncio
+
+from collections import namedtuple
+from concurrent.futures import Executor
+from typing import Optional, List, Union, Tuple, Callable, Any, AsyncIterator
+
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode, \
+	MissingNodeIDsError, SelfReferenceAttenpt, CycleAttemptError
+
+WriteRequest = namedtuple("WriteRequest", "op args future")
+
+class FacadeNotRunningError(RuntimeError):
+	def __str__(self):
+		return "Async facade writer is not running, call start() first"
+
+class AsyncDAG(object):
+	"""asyncio facade over a DirectedAciclicGraph.
+
+	Writes are queued to a single writer task which drains whatever is
+	pending at once: consecutive addEdge requests are applied together
+	through DirectedAciclicGraph.addEdges, with a single acyclicity
+	validation unless the batch introduces a cycle. Reads are async iterators that hand
+	control back to the loop every chunksize nodes or, on graphs bigger
+	than offloadthreshold nodes, run the traversal on an executor.
+	A write only waits for reads already running, new reads wait for
+	pending writes, so neither side can starve the other."""
+
+	def __init__(self, p_dag: Optional[DirectedAciclicGraph] = None,
+			chunksize: Optional[int] = 256,
+			offloadthreshold: Optional[int] = 100000,
+			maxbatch: Optional[int] = 4096,
+			executor: Optional[Executor] = None) -> None:
+		assert chunksize > 0
+		assert maxbatch > 0
+		if p_dag is None:
+			self.dag = DirectedAciclicGraph()
+		else:
+			self.dag = p_dag
+		self.chunksize = chunksize
+		self.offloadthreshold = offloadthreshold
+		self.maxbatch = maxbatch
+		# None means the loop's default executor
+		self.executor = executor
+		self._task = None
+		self._queue = None
+		self._stopping = False
+		self._readers = 0
+
+	def __repr__(self) -> str:
+		return f"async dag nodes:{len(self.dag.nodes)} running:{not self._task is None}"
+
+	async def start(self) -> None:
+		"Start the writer task on the running loop"
+		if not self._task is None:
+			return
+		self._queue = asyncio.Queue()
+		self._noreaders = asyncio.Event()
+		self._noreaders.set()
+		self._nowriter = asyncio.Event()
+		self._nowriter.set()
+		self._stopping = False
+		self._task = asyncio.ensure_future(self._writer())
+
+	async def stop(self) -> None:
+		"Apply every write already queued, then stop the writer task"
+		if self._task is None:
+			return
+		self._stopping = True
+		self._queue.put_nowait(None)
+		await self._task
+		self._task = None
+
+	async def __aenter__(self) -> "AsyncDAG":
+		await self.start()
+		return self
+
+	async def __aexit__(self, *p_exc) -> None:
+		await self.stop()
+
+	# -- read access ---------------------------------------------------
+
+	async def _acquireRead(self) -> None:
+		while not self._nowriter.is_set():
+			await self._nowriter.wait()
+		self._readers += 1
+		self._noreaders.clear()
+
+	def _releaseRead(self) -> None:
+		self._readers -= 1
+		if self._readers == 0:
+			self._noreaders.set()
+
+	def _mustOffload(self) -> bool:
+		return not self.offloadthreshold is None and len(self.dag.nodes) > self.offloadthreshold
+
+	async def _chunked(self, p_iterable) -> AsyncIterator[Any]:
+		cnt = 0
+		for item in p_iterable:
+			yield item
+			cnt += 1
+			if cnt % self.chunksize == 0:
+				await asyncio.sleep(0)
+
+	async def _read(self, p_iterator) -> AsyncIterator[BaseGraphNode]:
+		await self._acquireRead()
+		try:
+			if self._mustOffload():
+				items = await asyncio.get_running_loop().run_in_executor(self.executor, list, p_iterator)
+			else:
+				items = p_iterator
+			async for item in self._chunked(items):
+				yield item
+		finally:
+			self._releaseRead()
+
+	def iterateDown(self, start_ident: Optional[Union[str,int]] = None,
+			childrenids: Optional[List[Union[str,int]]] = None) -> AsyncIterator[BaseGraphNode]:
+		"Async version of DirectedAciclicGraph.iterateDown, writes wait until it is exhausted or closed"
+		return self._read(self.dag.iterateDown(start_ident=start_ident, childrenids=childrenids))
+
+	def iterateUp(self, start_ident: Optional[Union[str,int]] = None,
+			parentids: Optional[List[Union[str,int]]] = None) -> AsyncIterator[BaseGraphNode]:
+		"Async version of DirectedAciclicGraph.iterateUp, writes wait until it is exhausted or closed"
+		return self._read(self.dag.iterateUp(start_ident=start_ident, parentids=parentids))
+
+	async def query(self, p_func: Callable[[DirectedAciclicGraph], Any]) -> Any:
+		"Run p_func(dag) with no concurrent writes, on the executor if the graph is big"
+		await self._acquireRead()
+		try:
+			if self._mustOffload():
+				return await asyncio.get_running_loop().run_in_executor(self.executor, p_func, self.dag)
+			return p_func(self.dag)
+		finally:
+			self._releaseRead()
+
+	# -- write access --------------------------------------------------
+
+	async def _submit(self, p_op: str, *p_args) -> Any:
+		if self._task is None or self._stopping:
+			raise FacadeNotRunningError()
+		fut = asyncio.get_running_loop().create_future()
+		self._queue.put_nowait(WriteRequest(p_op, p_args, fut))
+		return await fut
+
+	async def addNode(self, p_node: BaseGraphNode, doraise: Optional[bool] = False) -> BaseGraphNode:
+		return await self._submit("addNode", p_node, doraise)
+
+	async def addEdge(self, p_fromid: Union[str,int], p_toid: Union[str,int],
+			doraise: Optional[bool] = False) -> Union[None, BaseGraphNode]:
+		return await self._submit("addEdge", p_fromid, p_toid, doraise)
+
+	async def addEdges(self, p_edges: List[Tuple[Union[str,int], Union[str,int]]],
+			doraise: Optional[bool] = False) -> List[Union[None, BaseGraphNode]]:
+		"Queue several edges at once, they are validated as a single batch"
+		return await asyncio.gather(*(self.addEdge(fromid, toid, doraise=doraise) for fromid, toid in p_edges))
+
+	async def removeEdge(self, p_fromid: Union[str,int], p_toid: Union[str,int], doraise: Optional[bool] = False) -> bool:
+		return await self._submit("removeEdge", p_fromid, p_toid, doraise)
+
+	async def removeNode(self, p_ident: Union[str,int]) -> BaseGraphNode:
+		return await self._submit("removeNode", p_ident)
+
+	def _runOne(self, p_req: WriteRequest) -> None:
+		try:
+			ret = getattr(self.dag, p_req.op)(*p_req.args)
+		except Exception as e:
+			p_req.future.set_exception(e)
+		else:
+			p_req.future.set_result(ret)
+
+	def _runEdges(self, p_reqs: List[WriteRequest]) -> None:
+		"Apply a run of addEdge requests with one cycle validation"
+
+		valid = []
+		for req in p_reqs:
+			fromid, toid, _doraise = req.args
+			if not fromid in self.dag.nodes:
+				req.future.set_exception(MissingNodeIDsError(fromid))
+			elif not toid in self.dag.nodes:
+				req.future.set_exception(MissingNodeIDsError(toid))
+			elif fromid == toid:
+				req.future.set_exception(SelfReferenceAttenpt(fromid))
+			else:
+				valid.append(req)
+
+		if len(valid) < 2:
+			for req in valid:
+				self._runOne(req)
+			return
+
+		# if the batch closes a cycle, only the edges inside the cycle region are bisected
+		rejected = set(self.dag.addEdges([req.args[:2] for req in valid]))
+		for req in valid:
+			fromid, toid, doraise = req.args
+			if not (fromid, toid) in rejected:
+				req.future.set_result(self.dag.nodes[fromid])
+			elif doraise:
+				req.future.set_exception(CycleAttemptError({fromid, toid}))
+			else:
+				req.future.set_result(None)
+
+	def _apply(self, p_batch: List[WriteRequest]) -> None:
+		"Apply queued requests in order, grouping consecutive addEdge runs"
+		edgerun = []
+		for req in p_batch:
+			if req.future.done():
+				# cancelled by the caller
+				continue
+			if req.op == "addEdge":
+				edgerun.append(req)
+				continue
+			if len(edgerun) > 0:
+				self._runEdges(edgerun)
+				edgerun = []
+			self._runOne(req)
+		if len(edgerun) > 0:
+			self._runEdges(edgerun)
+
+	async def _writer(self) -> None:
+		stopping = False
+		while not stopping:
+			batch = [await self._queue.get()]
+			while len(batch) < self.maxbatch and not self._queue.empty():
+				batch.append(self._queue.get_nowait())
+			if batch[-1] is None:
+				stopping = True
+				batch.pop()
+			if len(batch) < 1:
+				continue
+			# block new readers, wait for the running ones
+			self._nowriter.clear()
+			try:
+				await self._noreaders.wait()
+				self._apply(batch)
+			finally:
+				self._nowriter.set()
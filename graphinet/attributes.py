@@ -0,0 +1,227 @@
+
+import operator
+
+from array import array
+from itertools import compress, repeat
+from typing import Optional, List, Dict, Union, Any, Iterable, Tuple, Callable
+
+from graphinet.graphinet import DirectedAciclicGraph
+
+OPERATORS = {
+	"==": operator.eq,
+	"!=": operator.ne,
+	"<": operator.lt,
+	"<=": operator.le,
+	">": operator.gt,
+	">=": operator.ge
+}
+
+AGGREGATES = ("sum", "min", "max", "count", "mean")
+
+# typecode for category columns, values kept as int codes into a per column list
+CATEGORY = "cat"
+
+class UnknownAttributeError(RuntimeError):
+	def __init__(self, p_name):
+		self.name = p_name
+	def __str__(self):
+		return f"Unknown attribute column: {self.name}"
+
+class ExistingAttributeError(RuntimeError):
+	def __init__(self, p_name):
+		self.name = p_name
+	def __str__(self):
+		return f"Existing attribute column: {self.name}"
+
+class InvalidOperatorError(RuntimeError):
+	def __init__(self, p_op):
+		self.op = p_op
+	def __str__(self):
+		return f"Invalid operator or aggregate: {self.op}"
+
+class AttributeStore(object):
+	"""Columnar node attributes for a DirectedAciclicGraph.
+
+	Each column is a typed array (array module typecodes, or CATEGORY for
+	string-like values stored as int codes) indexed by the graph internal
+	node number, so filters and aggregations run over flat arrays instead
+	of per node getattr calls: comparisons are mapped over a whole column
+	as operator builtins, with no Python level call per node. Columns grow
+	with the graph, new nodes get the column default."""
+
+	def __init__(self, p_dag: DirectedAciclicGraph) -> None:
+		self.dag = p_dag
+		self.columns: Dict[str, array] = {}
+		self.defaults: Dict[str, Any] = {}
+		self.categories: Dict[str, List[Any]] = {}
+		self._catcodes: Dict[str, Dict[Any, int]] = {}
+
+	def __repr__(self) -> str:
+		return f"attribute store columns:{list(self.columns.keys())}"
+
+	def addColumn(self, p_name: str, typecode: Optional[str] = "d", default: Optional[Any] = 0) -> None:
+		if p_name in self.columns:
+			raise ExistingAttributeError(p_name)
+		if typecode == CATEGORY:
+			self.categories[p_name] = [default]
+			self._catcodes[p_name] = {default: 0}
+			self.columns[p_name] = array("l")
+			self.defaults[p_name] = 0
+		else:
+			self.columns[p_name] = array(typecode)
+			self.defaults[p_name] = default
+
+	def _column(self, p_name: str) -> array:
+		col = self.columns.get(p_name)
+		if col is None:
+			raise UnknownAttributeError(p_name)
+		missing = self.dag.nodeSlots() - len(col)
+		if missing > 0:
+			col.extend([self.defaults[p_name]] * missing)
+		return col
+
+	def _encode(self, p_name: str, p_value: Any, doadd: Optional[bool] = False) -> Any:
+		codes = self._catcodes.get(p_name)
+		if codes is None:
+			return p_value
+		code = codes.get(p_value)
+		if code is None and doadd:
+			code = len(self.categories[p_name])
+			codes[p_value] = code
+			self.categories[p_name].append(p_value)
+		return code
+
+	def _decode(self, p_name: str, p_value: Any) -> Any:
+		if p_name in self.categories:
+			return self.categories[p_name][p_value]
+		return p_value
+
+	def setValue(self, p_ident: Union[str,int], p_name: str, p_value: Any) -> None:
+		col = self._column(p_name)
+		col[self.dag.getIdentNum(p_ident, doraise=True)] = self._encode(p_name, p_value, doadd=True)
+
+	def setValues(self, p_name: str, p_values: Dict[Union[str,int], Any]) -> None:
+		col = self._column(p_name)
+		for ident, value in p_values.items():
+			col[self.dag.getIdentNum(ident, doraise=True)] = self._encode(p_name, value, doadd=True)
+
+	def getValue(self, p_ident: Union[str,int], p_name: str) -> Any:
+		col = self._column(p_name)
+		return self._decode(p_name, col[self.dag.getIdentNum(p_ident, doraise=True)])
+
+	def _predicate(self, p_name: str, p_op: str, p_value: Any) -> Tuple[Callable[[Any, Any], bool], Any]:
+		"Operator builtin and right operand to compare raw (possibly encoded) column values with"
+		func = OPERATORS.get(p_op)
+		if func is None:
+			raise InvalidOperatorError(p_op)
+		if p_name in self.categories:
+			if not p_op in ("==", "!="):
+				raise InvalidOperatorError(p_op)
+			code = self._encode(p_name, p_value)
+			if code is None:
+				# value never stored: no code equals -1
+				code = -1
+			return func, code
+		return func, p_value
+
+	def _filterNums(self, p_col: array, p_func: Callable[[Any, Any], bool], p_operand: Any,
+			p_nums: List[int]) -> Iterable[int]:
+		"p_nums whose column value satisfies the predicate, comparisons mapped at C level"
+		return compress(p_nums, map(p_func, map(p_col.__getitem__, p_nums), repeat(p_operand)))
+
+	def select(self, p_name: str, p_op: str, p_value: Any,
+			among: Optional[Iterable[Union[str,int]]] = None) -> List[Union[str,int]]:
+		"Idents (among all nodes, or among the given ones) whose p_name value satisfies p_op p_value"
+		col = self._column(p_name)
+		func, operand = self._predicate(p_name, p_op, p_value)
+		if among is None:
+			# whole column at once; numbers of removed nodes are filtered out afterwards
+			hits = compress(range(len(col)), map(func, col, repeat(operand)))
+			if len(self.dag.nodes) < self.dag.nodeSlots():
+				hits = filter(self.dag.isLiveNum, hits)
+			return list(map(self.dag.getNumIdent, hits))
+		nums = [self.dag.getIdentNum(ident, doraise=True) for ident in among]
+		return list(map(self.dag.getNumIdent, self._filterNums(col, func, operand, nums)))
+
+	def _aggregateNums(self, p_name: str, p_func: str, p_nums: Iterable[int]) -> Any:
+		if not p_func in AGGREGATES:
+			raise InvalidOperatorError(p_func)
+		iscategory = p_name in self.categories
+		if iscategory and p_func in ("sum", "mean"):
+			raise InvalidOperatorError(p_func)
+		col = self._column(p_name)
+		vals = list(map(col.__getitem__, p_nums))
+		if p_func == "count":
+			return len(vals)
+		if len(vals) < 1:
+			return None
+		if p_func == "sum":
+			return sum(vals)
+		if p_func == "mean":
+			return sum(vals) / len(vals)
+		if iscategory:
+			# codes follow insertion order, compare the decoded values
+			vals = [self.categories[p_name][code] for code in set(vals)]
+		if p_func == "min":
+			return min(vals)
+		return max(vals)
+
+	def aggregate(self, p_name: str, p_func: str, among: Optional[Iterable[Union[str,int]]] = None) -> Any:
+		"sum, min, max, count or mean of p_name over all nodes or the given idents"
+		if among is None:
+			nums = self.dag.liveNums()
+		else:
+			nums = [self.dag.getIdentNum(ident, doraise=True) for ident in among]
+		return self._aggregateNums(p_name, p_func, nums)
+
+	def _walk(self, p_start: Union[str,int], p_adjacency: Callable[[int], List[int]], p_pred=None,
+			prune: Optional[bool] = False, includestart: Optional[bool] = False) -> List[int]:
+		"Nums reached from p_start; with prune, nodes failing p_pred are not expanded"
+		start = self.dag.getIdentNum(p_start, doraise=True)
+		ret = [start] if includestart else []
+		seen = {start}
+		stack = [start]
+		while len(stack) > 0:
+			num = stack.pop()
+			for onum in p_adjacency(num):
+				if onum in seen:
+					continue
+				seen.add(onum)
+				if p_pred is None or p_pred(onum):
+					ret.append(onum)
+					stack.append(onum)
+				elif not prune:
+					stack.append(onum)
+		return ret
+
+	def _walkWhere(self, p_start: Union[str,int], p_adjacency: Callable[[int], List[int]], p_name: str, p_op: str,
+			p_value: Any, prune: bool) -> List[Union[str,int]]:
+		col = self._column(p_name)
+		func, operand = self._predicate(p_name, p_op, p_value)
+		if prune:
+			nums = self._walk(p_start, p_adjacency, lambda num: func(col[num], operand), prune=True)
+		else:
+			# plain reachability, then a single filtering pass over the reached numbers
+			nums = self._filterNums(col, func, operand, self._walk(p_start, p_adjacency))
+		return list(map(self.dag.getNumIdent, nums))
+
+	def descendantsWhere(self, p_start: Union[str,int], p_name: str, p_op: str, p_value: Any,
+			prune: Optional[bool] = False) -> List[Union[str,int]]:
+		"""Descendants of p_start satisfying the predicate. With prune=True the
+		predicate is applied during traversal, so nodes below a failing node are not visited."""
+		return self._walkWhere(p_start, self.dag.childNums, p_name, p_op, p_value, prune)
+
+	def ancestorsWhere(self, p_start: Union[str,int], p_name: str, p_op: str, p_value: Any,
+			prune: Optional[bool] = False) -> List[Union[str,int]]:
+		"Same as descendantsWhere, walking up"
+		return self._walkWhere(p_start, self.dag.parentNums, p_name, p_op, p_value, prune)
+
+	def aggregateDown(self, p_start: Union[str,int], p_name: str, p_func: str,
+			includestart: Optional[bool] = False) -> Any:
+		"Aggregate p_name over the descendants of p_start"
+		return self._aggregateNums(p_name, p_func, self._walk(p_start, self.dag.childNums, includestart=includestart))
+
+	def aggregateUp(self, p_start: Union[str,int], p_name: str, p_func: str,
+			includestart: Optional[bool] = False) -> Any:
+		"Aggregate p_name over the ancestors of p_start"
+		return self._aggregateNums(p_name, p_func, self._walk(p_start, self.dag.parentNums, includestart=includestart))
@@ -0,0 +1,289 @@
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict, Union, Tuple, Iterator, TextIO, Any
+
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode
+from graphinet.packing import parallelLayout, PackedLayout
+
+class RenderError(RuntimeError):
+	def __init__(self, p_msg):
+		self.msg = p_msg
+	def __str__(self):
+		return f"Cannot render: {self.msg}"
+
+class StageTimer(object):
+	"Collects wall clock durations of named stages, in execution order"
+
+	def __init__(self) -> None:
+		self.stages: List[Tuple[str, float]] = []
+
+	def __repr__(self) -> str:
+		return f"stage timer stages:{len(self.stages)}"
+
+	def run(self, p_name: str, p_func, *args, **kwargs) -> Any:
+		t0 = time.perf_counter()
+		ret = p_func(*args, **kwargs)
+		self.stages.append((p_name, time.perf_counter() - t0))
+		return ret
+
+	def add(self, p_name: str, p_elapsed: float) -> None:
+		self.stages.append((p_name, p_elapsed))
+
+	def report(self, p_out: TextIO) -> None:
+		for name, elapsed in self.stages:
+			p_out.write(f"stage {name}: {elapsed:.3f}s\n")
+
+def readEdges(p_stream: TextIO, sep: Optional[str] = None) -> Iterator[Tuple[str, Union[None, str]]]:
+	"""Edge file lines, 'from<sep>to', as (from, to); a single ident is a
+	lone node, yielded as (ident, None). Blank and '#' lines are skipped.
+	sep None splits on any whitespace."""
+	for line in p_stream:
+		line = line.strip()
+		if len(line) < 1 or line.startswith("#"):
+			continue
+		parts = [p.strip() for p in line.split(sep) if len(p.strip()) > 0]
+		if len(parts) == 1:
+			yield parts[0], None
+		else:
+			yield parts[0], parts[1]
+
+def _loadBatch(p_dag: DirectedAciclicGraph, p_edges: List[Tuple[str, str]], p_rejected: List[Tuple[str, str]]) -> None:
+	"Add a batch of edges with a single cycle validation, narrowed down by addEdges only if the batch closes a cycle"
+	valid = []
+	for fromid, toid in p_edges:
+		if fromid == toid:
+			p_rejected.append((fromid, toid))
+		else:
+			valid.append((fromid, toid))
+	if len(valid) < 1:
+		return
+	p_rejected.extend(p_dag.addEdges(valid))
+
+def loadGraph(p_stream: TextIO, sep: Optional[str] = None, batchsize: Optional[int] = 100000
+		) -> Tuple[DirectedAciclicGraph, List[Tuple[str, str]]]:
+	"""Stream an edge file into a new graph, batchsize edges at a time.
+	Returns the graph and the edges rejected for closing a cycle (self loops included)."""
+
+	dag = DirectedAciclicGraph()
+	rejected = []
+	batch = []
+	for fromid, toid in readEdges(p_stream, sep=sep):
+		for ident in (fromid, toid):
+			if not ident is None and dag.getIdentNum(ident) is None:
+				dag.addNode(BaseGraphNode(ident=ident))
+		if toid is None:
+			continue
+		batch.append((fromid, toid))
+		if len(batch) >= batchsize:
+			_loadBatch(dag, batch, rejected)
+			batch = []
+	_loadBatch(dag, batch, rejected)
+
+	return dag, rejected
+
+# -- analysis stages, module level so they can run on worker processes.
+# They all receive the parent adjacency by internal node number.
+
+def depthStats(p_parents: List[List[int]]) -> Tuple[float, Dict[str, Any]]:
+	"Longest path depth from the roots: maximum and histogram"
+	t0 = time.perf_counter()
+	children = [[] for _num in p_parents]
+	for num, pnums in enumerate(p_parents):
+		for pnum in pnums:
+			children[pnum].append(num)
+	pending = [len(pnums) for pnums in p_parents]
+	depth = [0] * len(p_parents)
+	ready = [num for num, cnt in enumerate(pending) if cnt == 0]
+	while len(ready) > 0:
+		num = ready.pop()
+		for cnum in children[num]:
+			depth[cnum] = max(depth[cnum], depth[num] + 1)
+			pending[cnum] -= 1
+			if pending[cnum] == 0:
+				ready.append(cnum)
+	hist = Counter(depth)
+	return time.perf_counter() - t0, {"maxdepth": max(depth, default=0), "depths": dict(sorted(hist.items()))}
+
+def degreeStats(p_parents: List[List[int]]) -> Tuple[float, Dict[str, Any]]:
+	"Fan-in and fan-out histograms"
+	t0 = time.perf_counter()
+	fanout = [0] * len(p_parents)
+	for pnums in p_parents:
+		for pnum in pnums:
+			fanout[pnum] += 1
+	fanin = Counter(len(pnums) for pnums in p_parents)
+	return time.perf_counter() - t0, {"fanin": dict(sorted(fanin.items())), "fanout": dict(sorted(Counter(fanout).items()))}
+
+def componentStats(p_parents: List[List[int]]) -> Tuple[float, Dict[str, Any]]:
+	"Weakly connected components, by union-find: count and size histogram"
+	t0 = time.perf_counter()
+	up = list(range(len(p_parents)))
+	def find(p_num):
+		while up[p_num] != p_num:
+			up[p_num] = up[up[p_num]]
+			p_num = up[p_num]
+		return p_num
+	for num, pnums in enumerate(p_parents):
+		for pnum in pnums:
+			a, b = find(num), find(pnum)
+			if a != b:
+				up[a] = b
+	sizes = Counter(find(num) for num in range(len(p_parents)))
+	return time.perf_counter() - t0, {"components": len(sizes), "largest": max(sizes.values(), default=0),
+		"sizes": dict(sorted(Counter(sizes.values()).items()))}
+
+ANALYSIS_STAGES = (("depths", depthStats), ("degrees", degreeStats), ("components", componentStats))
+
+def liveParents(p_dag: DirectedAciclicGraph) -> List[List[int]]:
+	"Parent adjacency renumbered densely over the nodes in the graph, slots of removed nodes left out"
+	if len(p_dag.nodes) == p_dag.nodeSlots():
+		return [p_dag.parentNums(num) for num in range(p_dag.nodeSlots())]
+	live = sorted(p_dag.liveNums())
+	pos = {num: idx for idx, num in enumerate(live)}
+	return [[pos[pnum] for pnum in p_dag.parentNums(num)] for num in live]
+
+def analyze(p_dag: DirectedAciclicGraph, p_timer: StageTimer, workers: Optional[int] = None) -> Dict[str, Any]:
+	"""Run the analysis stages, each on its own worker process when workers > 1.
+	Stage timings are the ones measured inside each stage."""
+
+	if workers is None:
+		workers = os.cpu_count() or 1
+	parents = liveParents(p_dag)
+
+	ret = {}
+	if workers < 2:
+		results = [func(parents) for _name, func in ANALYSIS_STAGES]
+	else:
+		with ProcessPoolExecutor(max_workers=min(workers, len(ANALYSIS_STAGES))) as executor:
+			futures = [executor.submit(func, parents) for _name, func in ANALYSIS_STAGES]
+			results = [fut.result() for fut in futures]
+	for (name, _func), (elapsed, stats) in zip(ANALYSIS_STAGES, results):
+		p_timer.add(name, elapsed)
+		ret.update(stats)
+
+	return ret
+
+def writeLayout(p_packed: PackedLayout, p_out: TextIO) -> None:
+	"Node positions as 'ident<TAB>x<TAB>y' lines"
+	for ident, pt in p_packed.positions.items():
+		p_out.write(f"{ident}\t{pt.x}\t{pt.y}\n")
+
+def renderSVG(p_dag: DirectedAciclicGraph, p_packed: PackedLayout, p_path: str, radius: Optional[int] = 6) -> None:
+	"Draw nodes as circles and edges as straight paths, needs rpcbSVG"
+	try:
+		from rpcbSVG.SVGLib import BasicDocSVG
+		from rpcbSVG.SVGstyle import Stroke, Fill
+		from rpcbSVG.BasicGeom import list2AbsPolylinePath
+	except ImportError:
+		raise RenderError("SVG output requires the rpcbSVG package")
+
+	sdoc = BasicDocSVG(*p_packed.canvas.getDims())
+	sdoc.addStyle('path', Stroke('#7f7b9f', w=1))
+	sdoc.addStyle('path', Fill())
+	sdoc.addStyle('circle', Fill('#c4bfef'))
+	sdoc.addStyle('circle', Stroke('#7f7b9f', w=1))
+
+	positions = p_packed.positions
+	for ident, node in p_dag.nodes.items():
+		for cid in node.getChildrenIds():
+			sdoc.addPath(list2AbsPolylinePath([positions[ident], positions[cid]]))
+	for pt in positions.values():
+		sdoc.addCircle(pt.x, pt.y, radius)
+
+	with open(p_path, 'w') as fl:
+		fl.write(sdoc.toString())
+
+def _load(p_args, p_timer: StageTimer) -> Tuple[DirectedAciclicGraph, List[Tuple[str, str]]]:
+	if p_args.file == "-":
+		return p_timer.run("load", loadGraph, sys.stdin, sep=p_args.sep, batchsize=p_args.batch)
+	with open(p_args.file) as fl:
+		return p_timer.run("load", loadGraph, fl, sep=p_args.sep, batchsize=p_args.batch)
+
+def _validationReport(p_dag: DirectedAciclicGraph, p_rejected: List[Tuple[str, str]], p_limit: int) -> Dict[str, Any]:
+	roots = p_dag.rootids
+	return {
+		"nodes": len(p_dag.nodes),
+		"edges": sum(len(p_dag.childNums(num)) for num in p_dag.liveNums()),
+		"roots": len(roots),
+		"rootsample": roots[:p_limit],
+		"cycleedges": len(p_rejected),
+		"cyclesample": [list(edge) for edge in p_rejected[:p_limit]]
+	}
+
+def _printReport(p_report: Dict[str, Any], p_json: bool, p_out: TextIO) -> None:
+	if p_json:
+		json.dump(p_report, p_out)
+		p_out.write("\n")
+		return
+	for key, value in p_report.items():
+		p_out.write(f"{key}: {value}\n")
+
+def buildParser() -> argparse.ArgumentParser:
+
+	parser = argparse.ArgumentParser(prog="graphinet", description="Batch validation, analysis and rendering of graph edge files")
+	sub = parser.add_subparsers(dest="command")
+	sub.required = True
+
+	common = argparse.ArgumentParser(add_help=False)
+	common.add_argument("file", help="edge file, one 'from to' pair per line, '-' for stdin")
+	common.add_argument("--sep", default=None, help="field separator (default: any whitespace)")
+	common.add_argument("--batch", type=int, default=100000, help="edges validated together while loading")
+	common.add_argument("--workers", type=int, default=None, help="worker processes (default: cpu count)")
+	common.add_argument("--limit", type=int, default=10, help="sample size of listed roots and cycle edges")
+	common.add_argument("--json", action="store_true", help="print the report as JSON")
+	common.add_argument("-q", "--quiet", action="store_true", help="do not print stage timings")
+
+	sub.add_parser("validate", parents=[common], help="report roots and edges closing cycles, exit 1 on cycles")
+	sub.add_parser("analyze", parents=[common], help="validate, plus depth, fan-in/fan-out and component statistics")
+	render = sub.add_parser("render", parents=[common], help="lay out components and write positions and/or SVG")
+	render.add_argument("--layout", default=None, help="positions output file, '-' for stdout")
+	render.add_argument("--svg", default=None, help="SVG output file (needs rpcbSVG)")
+	render.add_argument("--cellsize", type=int, default=40, help="layout cell width and height")
+
+	return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+
+	args = buildParser().parse_args(argv)
+	timer = StageTimer()
+	ret = 0
+
+	dag, rejected = _load(args, timer)
+	report = timer.run("validate", _validationReport, dag, rejected, args.limit)
+	if len(rejected) > 0 and args.command == "validate":
+		ret = 1
+
+	if args.command == "analyze":
+		report.update(analyze(dag, timer, workers=args.workers))
+
+	if args.command == "render":
+		packed = timer.run("layout", parallelLayout, dag, maxworkers=args.workers, cellw=args.cellsize, cellh=args.cellsize)
+		report["width"], report["height"] = packed.canvas.getDims()
+		if args.layout == "-":
+			timer.run("writelayout", writeLayout, packed, sys.stdout)
+		elif not args.layout is None:
+			with open(args.layout, 'w') as fl:
+				timer.run("writelayout", writeLayout, packed, fl)
+		if not args.svg is None:
+			try:
+				timer.run("svg", renderSVG, dag, packed, args.svg)
+			except RenderError as e:
+				sys.stderr.write(f"{e}\n")
+				ret = 2
+
+	if args.command != "render" or args.layout != "-":
+		_printReport(report, args.json, sys.stdout)
+	if not args.quiet:
+		timer.report(sys.stderr)
+
+	return ret
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -7,6 +7,7 @@ from enum import IntEnum
 from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode
 
 Pt = namedtuple("Pt", "x y")
+Rect = namedtuple("Rect", "minx miny maxx maxy")
 
 class AxisType(IntEnum):
 	NONE = 0
@@ -155,6 +156,10 @@ class QuantizedAxis(LinearAxis):
 		q = self.sizev / self.nquantiles
 		self.qsz = round(q)
 
+	def getQuantileSpan(self) -> float:
+		"Size of each quantile cell, in space units"
+		return abs(self.maxspace - self.minspace) / self.nquantiles
+
 	def setValuesDomainSize(self, minimum: Union[float, int], size: Union[float, int]) -> None:
 		super().setValuesDomainSize(minimum, size)
 		self._calcQSize()
@@ -0,0 +1,117 @@
+
+from typing import Optional, List, Union
+
+from graphinet.graphinet import DirectedAciclicGraph
+
+class DominatorTree(object):
+	"""Dominator (or, with postdominators=True, post-dominator) tree of a DAG.
+
+	A node d dominates n if every path from the roots to n goes through d.
+	Computed with the Cooper-Harvey-Kennedy intersection over topological
+	order, which needs a single pass on a DAG since all predecessors of a
+	node are final before it is reached. Several roots (or sinks, for
+	post-dominators) hang from a virtual super-root, reported as None."""
+
+	def __init__(self, p_dag: DirectedAciclicGraph, postdominators: Optional[bool] = False) -> None:
+
+		self.dag = p_dag
+		self.postdominators = postdominators
+
+		order = p_dag.topologicalNums()
+		if postdominators:
+			order.reverse()
+			preds = p_dag.childNums
+		else:
+			preds = p_dag.parentNums
+
+		nslots = p_dag.nodeSlots()
+		# virtual super-root takes the slot past the last node number
+		self._super = nslots
+		pos = [0] * (nslots + 1)
+		for idx, num in enumerate(order):
+			pos[num] = idx + 1
+		self._idom = [None] * (nslots + 1)
+
+		for num in order:
+			newidom = None
+			for pnum in preds(num):
+				if newidom is None:
+					newidom = pnum
+				else:
+					a, b = pnum, newidom
+					while a != b:
+						while pos[a] > pos[b]:
+							a = self._idom[a]
+						while pos[b] > pos[a]:
+							b = self._idom[b]
+					newidom = a
+			if newidom is None:
+				newidom = self._super
+			self._idom[num] = newidom
+
+		# dominator tree children and DFS intervals, for constant time dominance tests
+		self._tchildren = [[] for _i in range(nslots + 1)]
+		for num in order:
+			self._tchildren[self._idom[num]].append(num)
+		self._pre = [0] * (nslots + 1)
+		self._post = [0] * (nslots + 1)
+		self._preorder = []
+		counter = 0
+		stack = [(self._super, False)]
+		while len(stack) > 0:
+			num, closing = stack.pop()
+			if closing:
+				self._post[num] = counter
+				continue
+			self._pre[num] = counter
+			self._preorder.append(num)
+			counter += 1
+			stack.append((num, True))
+			for cnum in reversed(self._tchildren[num]):
+				stack.append((cnum, False))
+
+	def __repr__(self) -> str:
+		kind = "post-dominator" if self.postdominators else "dominator"
+		return f"{kind} tree nodes:{len(self._preorder) - 1}"
+
+	def _num(self, p_ident: Union[str,int]) -> int:
+		return self.dag.getIdentNum(p_ident, doraise=True)
+
+	def _ident(self, p_num: int) -> Union[None, str, int]:
+		if p_num == self._super:
+			return None
+		return self.dag.getNumIdent(p_num)
+
+	def immediateDominator(self, p_ident: Union[str,int]) -> Union[None, str, int]:
+		"Closest strict dominator of p_ident, None if only the virtual super-root dominates it"
+		return self._ident(self._idom[self._num(p_ident)])
+
+	def dominates(self, p_dominator: Union[str,int], p_ident: Union[str,int]) -> bool:
+		"True if every path to p_ident goes through p_dominator (a node dominates itself)"
+		d = self._num(p_dominator)
+		n = self._num(p_ident)
+		return self._pre[d] <= self._pre[n] and self._post[n] <= self._post[d]
+
+	def dominators(self, p_ident: Union[str,int]) -> List[Union[str,int]]:
+		"Strict dominators of p_ident, closest first: its single points of failure"
+		ret = []
+		num = self._idom[self._num(p_ident)]
+		while num != self._super:
+			ret.append(self.dag.getNumIdent(num))
+			num = self._idom[num]
+		return ret
+
+	def dominatedSubtree(self, p_ident: Union[str,int]) -> List[Union[str,int]]:
+		"p_ident and every node it dominates, in dominator tree preorder"
+		num = self._num(p_ident)
+		start = self._pre[num]
+		end = self._post[num]
+		return [self.dag.getNumIdent(onum) for onum in self._preorder[start:end]]
+
+	def getChildren(self, p_ident: Union[str,int]) -> List[Union[str,int]]:
+		"Nodes immediately dominated by p_ident, or by the virtual super-root if p_ident is None"
+		if p_ident is None:
+			num = self._super
+		else:
+			num = self._num(p_ident)
+		return [self.dag.getNumIdent(cnum) for cnum in self._tchildren[num]]
@@ -1,11 +1,24 @@
  
+import hashlib
+
+from copy import copy
+from collections import namedtuple
+from collections.abc import Sequence
 from queue import PriorityQueue
 
-from typing import Optional, List, Union
+from typing import Optional, List, Dict, Union, Iterable, Tuple
 
 PARENT = 0
 CHILD = 2
 
+# structural hashes are sums of per-element digests, modulo 2**64
+HASH_MASK = (1 << 64) - 1
+
+def stableDigest(*parts) -> int:
+	"64 bit digest of parts repr, stable across processes (unlike builtin hash)"
+	h = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8)
+	return int.from_bytes(h.digest(), "little")
+
 class NotBaseNodeError(RuntimeError):
 	def __str__(self):
 		return "Not a BaseNode instance"
@@ -46,12 +59,66 @@ class SelfReferenceAttenpt(RuntimeError):
 	def __str__(self):
 		return f"Attempt to self reference, id: {self.p_ids}"
 
+class NodeInGraphError(RuntimeError):
+	def __init__(self, p_id):
+		self.p_id = p_id
+	def __str__(self):
+		return f"Edges of node {self.p_id} belong to its graph, use DirectedAciclicGraph.addEdge or removeEdge"
+
+class InvalidRootIdsError(RuntimeError):
+	def __init__(self, p_extra, p_missing):
+		self.extra = p_extra
+		self.missing = p_missing
+	def __str__(self):
+		return f"Root ids must be exactly the nodes without parents, not roots: {self.extra}, missing roots: {self.missing}"
+
 class ImproperSortingMethod(RuntimeError):
 	def __init__(self, p_classname):
 		self.p_classname = p_classname
 	def __str__(self):
 		return f"Method __lt__ for sorting nodes is improperly extended for {self.p_classname}"
 		
+GraphDiff = namedtuple("GraphDiff", "added_nodes removed_nodes added_edges removed_edges added_roots removed_roots")
+
+class IdentListView(Sequence):
+	"""Read-only list of idents over one of the graph's interned adjacency lists.
+
+	Once a node is added to a DirectedAciclicGraph, its parentids and
+	childrenids become views like this one, so each edge is stored only
+	once, as ints, and node lists cannot drift from the graph. Edges are
+	changed through the graph (addEdge, removeEdge), not through the node."""
+
+	__slots__ = ("_nums", "_idents")
+
+	def __init__(self, p_nums: List[int], p_idents: List[Union[str,int]]) -> None:
+		self._nums = p_nums
+		self._idents = p_idents
+
+	def __getitem__(self, p_idx):
+		if isinstance(p_idx, slice):
+			return [self._idents[num] for num in self._nums[p_idx]]
+		return self._idents[self._nums[p_idx]]
+
+	def __len__(self) -> int:
+		return len(self._nums)
+
+	def __iter__(self):
+		idents = self._idents
+		for num in self._nums:
+			yield idents[num]
+
+	def __eq__(self, p_other) -> bool:
+		if isinstance(p_other, (list, tuple, IdentListView)):
+			return list(self) == list(p_other)
+		return NotImplemented
+
+	def __repr__(self) -> str:
+		return repr(list(self))
+
+	def __reduce__(self):
+		# pickles (e.g. to worker processes) as a plain list, not the whole graph
+		return (list, (list(self),))
+
 class BaseGraphNode(object):
 
 	def __init__(self, ident: Optional[List[Union[str,int]]] = None, 
@@ -95,17 +162,26 @@ class BaseGraphNode(object):
 	def getChildrenIds(self) -> List[Union[str,int]]:
 		return self.childrenids
 
+	def _assertDetached(self):
+		"Once in a graph, id lists are read-only views and edges change through the graph"
+		if isinstance(self.parentids, IdentListView) or isinstance(self.childrenids, IdentListView):
+			raise NodeInGraphError(self.ident)
+
 	def removeParentId(self, p_pid: Union[str,int]):
+		self._assertDetached()
 		if p_pid in self.parentids:
 			self.parentids.remove(p_pid)
 
 	def removeChildId(self, p_cid: Union[str,int]):
+		self._assertDetached()
 		if p_cid in self.childrenids:
 			self.childrenids.remove(p_cid)
 
 	def assertOtherIsParent(self, p_other):
 		if not isinstance(p_other, BaseGraphNode):
 			raise NotBaseNodeError()
+		self._assertDetached()
+		p_other._assertDetached()
 		if not p_other.ident in self.getParentIds():
 			self.parentids.append(p_other.ident)
 		if not self.ident in p_other.getChildrenIds():
@@ -114,6 +190,8 @@ class BaseGraphNode(object):
 	def assertOtherIsChild(self, p_other):
 		if not isinstance(p_other, BaseGraphNode):
 			raise NotBaseNodeError()
+		self._assertDetached()
+		p_other._assertDetached()
 		if not p_other.ident in self.getChildrenIds():
 			self.childrenids.append(p_other.ident)
 		if not self.ident in p_other.getParentIds():
@@ -138,8 +216,70 @@ class BaseGraphNode(object):
 class DirectedAciclicGraph(object):	
 	
 	def __init__(self):
-		self.rootids: List[Union[str,int]] = []		
 		self.nodes = {}
+		# bumped on every structural change, lets derived artifacts (tiles, caches) detect staleness
+		self.version = 0
+		self._structhash = 0
+		# ident interning: external idents are mapped once to dense ints, used by all
+		# internal adjacency, traversal bookkeeping and root tracking
+		self._nums: Dict[Union[str,int], int] = {}
+		self._idents: List[Union[str,int]] = []
+		self._parents: List[List[int]] = []
+		self._children: List[List[int]] = []
+		# per node sum of its incoming edge digests, lets diff skip unchanged nodes
+		self._adjhash: List[int] = []
+		# insertion ordered set of root numbers
+		self._roots: Dict[int, None] = {}
+		# rootids list, rebuilt on first access after roots change, handed out as copies
+		self._rootids = None
+
+	@property
+	def rootids(self) -> List[Union[str,int]]:
+		"Nodes without parents, in the order they became roots (a copy, changing it does not affect the graph)"
+		if self._rootids is None:
+			self._rootids = [self._idents[num] for num in self._roots]
+		return list(self._rootids)
+
+	@rootids.setter
+	def rootids(self, p_rootids: List[Union[str,int]]) -> None:
+		"Reorder the roots; they are kept up to date by the graph, so only a permutation of the current ones is accepted"
+		nums = {self.getIdentNum(ident, doraise=True): None for ident in p_rootids}
+		if len(nums) != len(p_rootids) or nums.keys() != self._roots.keys():
+			extra = [self._idents[num] for num in nums if not num in self._roots]
+			missing = [self._idents[num] for num in self._roots if not num in nums]
+			raise InvalidRootIdsError(extra, missing)
+		self._roots = nums
+		self._rootids = None
+
+	def _intern(self, p_ident: Union[str,int]) -> int:
+		num = self._nums.get(p_ident)
+		if num is None:
+			num = len(self._idents)
+			self._nums[p_ident] = num
+			self._idents.append(p_ident)
+			self._parents.append([])
+			self._children.append([])
+			self._adjhash.append(0)
+		return num
+
+	def getIdentNum(self, p_ident: Union[str,int], doraise: Optional[bool] = False) -> Union[None, int]:
+		"Internal node number of an ident"
+		ret = self._nums.get(p_ident)
+		if ret is None and doraise:
+			raise MissingNodeIDsError(p_ident)
+		return ret
+
+	def getNumIdent(self, p_num: int) -> Union[str,int]:
+		"External ident of an internal node number"
+		return self._idents[p_num]
+
+	def _hashNode(self, p_ident: Union[str,int], p_sign: Optional[int] = 1) -> None:
+		self._structhash = (self._structhash + p_sign * stableDigest("n", p_ident)) & HASH_MASK
+
+	def structuralHash(self) -> str:
+		"""Canonical hash of node idents and edges, independent of insertion order.
+		Kept up to date incrementally as nodes and edges are added or removed."""
+		return f"{self._structhash:016x}"
 		
 	def checkIDs(self, lids: List[Union[str,int]]) -> None:
 		if len(lids) < 1:
@@ -148,6 +288,45 @@ class DirectedAciclicGraph(object):
 		xstkeys = set(self.nodes.keys())
 		if len(xstkeys) > 0 and tstids.isdisjoint(xstkeys):
 			raise MissingNodeIDsError(tstids.difference(xstkeys))	
+
+	def _iterate(self, p_adjacency: List[List[int]], p_startnums: List[int], p_lvl: int):
+
+		fringe = PriorityQueue()
+		fringed_nums = set()
+
+		for num in p_startnums:
+			fringe.put((p_lvl, self.nodes[self._idents[num]], num))
+			fringed_nums.add(num)
+
+		while not fringe.empty():
+			flvl, fn, fnum = fringe.get()
+			yield fn
+			for onum in p_adjacency[fnum]:
+				if onum in fringed_nums:
+					continue
+				fo = self.nodes[self._idents[onum]]
+				try:
+					fringe.put((flvl+1, fo, onum))
+					fringed_nums.add(onum)
+				except TypeError:
+					raise ImproperSortingMethod(str(type(fo)))
+
+	def _reaches(self, p_adjacency: List[List[int]], p_startnums: List[int], p_targetnums: set) -> set:
+		"Which of p_targetnums are reachable from p_startnums (included) along p_adjacency"
+		found = set()
+		seen = set(p_startnums)
+		stack = list(p_startnums)
+		while len(stack) > 0:
+			num = stack.pop()
+			if num in p_targetnums:
+				found.add(num)
+				if len(found) == len(p_targetnums):
+					break
+			for onum in p_adjacency[num]:
+				if not onum in seen:
+					seen.add(onum)
+					stack.append(onum)
+		return found
 			
 	def iterateUp(self, start_ident: Optional[Union[str,int]] = None, 
 			parentids: Optional[List[Union[str,int]]] = None) -> None:
@@ -157,41 +336,13 @@ class DirectedAciclicGraph(object):
 		
 		if not start_ident is None and not start_ident in self.nodes.keys():
 			raise MissingNodeIDsError(start_ident)
-			
-		fringe = PriorityQueue()
-		fringed_ids = set()
-		lvl = 0
 
 		if not start_ident is None:
-			
-			n = self.nodes[start_ident]
-			fringe.put((lvl, n))
-			lvl += 1
-		
-			for pid in n.parentids:
-				p = self.nodes[pid]
-				fringe.put((lvl, p))
-				fringed_ids.add(pid)
-
+			num = self._nums[start_ident]
+			yield self.nodes[start_ident]
+			yield from self._iterate(self._parents, self._parents[num], 1)
 		else:
-
-			for pid in parentids:
-				p = self.nodes[pid]
-				fringe.put((lvl, p))
-				fringed_ids.add(pid)
-			
-		while not fringe.empty():
-			flvl, fn = fringe.get()
-			yield fn
-			for fpid in fn.parentids:
-				if fpid in fringed_ids:
-					continue
-				fp = self.nodes[fpid]
-				try:
-					fringe.put((flvl+1, fp))
-					fringed_ids.add(fpid)
-				except TypeError:
-					raise ImproperSortingMethod(str(type(fp)))
+			yield from self._iterate(self._parents, [self._nums[pid] for pid in parentids], 0)
 
 	def iterateDown(self, start_ident: Optional[Union[str,int]] = None, 
 			childrenids: Optional[List[Union[str,int]]] = None) -> None:
@@ -201,42 +352,131 @@ class DirectedAciclicGraph(object):
 
 		if not start_ident is None and not start_ident in self.nodes.keys():
 			raise MissingNodeIDsError(start_ident)
-			
-		fringe = PriorityQueue()
-		fringed_ids = set()
-		lvl = 0
 
 		if not start_ident is None:
-			
-			n = self.nodes[start_ident]
-			fringe.put((lvl, n))
-			lvl += 1
-			
-			for pid in n.childrenids:
-				p = self.nodes[pid]
-				fringe.put((lvl, p))
-				fringed_ids.add(pid)
-
+			num = self._nums[start_ident]
+			yield self.nodes[start_ident]
+			yield from self._iterate(self._children, self._children[num], 1)
 		else:
+			yield from self._iterate(self._children, [self._nums[cid] for cid in childrenids], 0)
+		
+	def weaklyConnectedComponents(self) -> List[List[Union[str,int]]]:
+		"Node ident lists of each weakly connected component, in order of discovery from rootids"
+
+		ret = []
+		seen = set()
+		for rnum in self._roots:
+			if rnum in seen:
+				continue
+			comp = []
+			seen.add(rnum)
+			stack = [rnum]
+			while len(stack) > 0:
+				num = stack.pop()
+				comp.append(num)
+				for onum in self._parents[num] + self._children[num]:
+					if not onum in seen:
+						seen.add(onum)
+						stack.append(onum)
+			ret.append([self._idents[num] for num in comp])
 
-			for pid in childrenids:
-				p = self.nodes[pid]
-				fringe.put((lvl, p))
-				fringed_ids.add(pid)
+		return ret
+
+	# -- node number level access, for algorithms keeping their own arrays indexed
+	# by node number. Numbers are never reused, so removed nodes leave unused slots.
+	# Returned adjacency lists are the graph's own, they must not be modified.
+
+	def nodeSlots(self) -> int:
+		"Node numbers handed out so far, removed nodes included: the size of arrays indexed by node number"
+		return len(self._idents)
+
+	def liveNums(self) -> Iterable[int]:
+		"Numbers of the nodes currently in the graph"
+		return self._nums.values()
+
+	def isLiveNum(self, p_num: int) -> bool:
+		return self._nums.get(self._idents[p_num]) == p_num
+
+	def rootNums(self) -> List[int]:
+		return list(self._roots)
+
+	def parentNums(self, p_num: int) -> List[int]:
+		return self._parents[p_num]
+
+	def childNums(self, p_num: int) -> List[int]:
+		return self._children[p_num]
+
+	def topologicalNums(self) -> List[int]:
+		"Kahn topological order of internal node numbers, parents before children"
+		pending = [len(pnums) for pnums in self._parents]
+		ret = [num for num in self._roots]
+		idx = 0
+		while idx < len(ret):
+			for cnum in self._children[ret[idx]]:
+				pending[cnum] -= 1
+				if pending[cnum] == 0:
+					ret.append(cnum)
+			idx += 1
+		return ret
+
+	def topologicalOrder(self) -> List[Union[str,int]]:
+		"Node idents ordered so that every node comes after all its parents"
+		return [self._idents[num] for num in self.topologicalNums()]
+
+	def _linkNums(self, p_fromnum: int, p_tonum: int) -> None:
+		self._children[p_fromnum].append(p_tonum)
+		self._parents[p_tonum].append(p_fromnum)
+		if p_tonum in self._roots:
+			del self._roots[p_tonum]
+			self._rootids = None
+		dg = stableDigest("e", self._idents[p_fromnum], self._idents[p_tonum])
+		self._adjhash[p_tonum] = (self._adjhash[p_tonum] + dg) & HASH_MASK
+		self._structhash = (self._structhash + dg) & HASH_MASK
+
+	def _unlinkNums(self, p_fromnum: int, p_tonum: int) -> None:
+		self._children[p_fromnum].remove(p_tonum)
+		self._parents[p_tonum].remove(p_fromnum)
+		if len(self._parents[p_tonum]) < 1:
+			self._roots[p_tonum] = None
+			self._rootids = None
+		dg = stableDigest("e", self._idents[p_fromnum], self._idents[p_tonum])
+		self._adjhash[p_tonum] = (self._adjhash[p_tonum] - dg) & HASH_MASK
+		self._structhash = (self._structhash - dg) & HASH_MASK
+
+	def _insertNode(self, p_node: BaseGraphNode) -> int:
+		"Register a node with no edges, as a root; its id lists become views over the adjacency"
+		self.nodes[p_node.ident] = p_node
+		num = self._intern(p_node.ident)
+		self._roots[num] = None
+		self._rootids = None
+		p_node.parentids = IdentListView(self._parents[num], self._idents)
+		p_node.childrenids = IdentListView(self._children[num], self._idents)
+		self._hashNode(p_node.ident)
+		return num
+
+	def _dropNode(self, p_num: int) -> BaseGraphNode:
+		"Unregister an edgeless node; its number is not reused"
+		ident = self._idents[p_num]
+		del self._nums[ident]
+		if p_num in self._roots:
+			del self._roots[p_num]
+			self._rootids = None
+		self._hashNode(ident, p_sign=-1)
+		ret = self.nodes.pop(ident)
+		ret.parentids = []
+		ret.childrenids = []
+		return ret
+
+	def _restoreNode(self, p_num: int, p_node: BaseGraphNode) -> None:
+		"Undo _dropNode, the node gets its former number back"
+		self.nodes[p_node.ident] = p_node
+		self._nums[p_node.ident] = p_num
+		self._roots[p_num] = None
+		self._rootids = None
+		p_node.parentids = IdentListView(self._parents[p_num], self._idents)
+		p_node.childrenids = IdentListView(self._children[p_num], self._idents)
+		self._hashNode(p_node.ident)
 
-		while not fringe.empty():
-			flvl, fn = fringe.get()
-			yield fn
-			for fpid in fn.childrenids:
-				if fpid in fringed_ids:
-					continue
-				fp = self.nodes[fpid]
-				try:
-					fringe.put((flvl+1, fp))
-					fringed_ids.add(fpid)
-				except TypeError:
-					raise ImproperSortingMethod(str(type(fp)))
-		
 	def addNode(self, p_node: BaseGraphNode, doraise: Optional[bool] = False) -> BaseGraphNode:	
 
 		if not isinstance(p_node, BaseGraphNode):
@@ -251,48 +491,31 @@ class DirectedAciclicGraph(object):
 		if p_node.ident in chldids or p_node.ident in parids:
 			raise SelfReferenceAttenpt(p_node.ident)
 
-		cycle_alarm_ids = set()
-		# prevent cycles: upward
-		iup = {n.ident for n in self.iterateUp(parentids = parids)}
-		if len(chldids) > 0 and len(iup) > 0 and chldids.issubset(iup):
-			for xcid in chldids.intersection(iup):
-				cycle_alarm_ids.add(xcid)
-				p_node.removeChildId(xcid)
-
-		# prevent cycles: downward
-		idn = {n.ident for n in self.iterateDown(childrenids=chldids)}
-		if len(parids) > 0 and len(idn) > 0 and parids.issubset(idn):
-			for xpid in parids.intersection(idn):
-				cycle_alarm_ids.add(xpid)
-				p_node.removeParentId(xpid)
-
-		if doraise and len(cycle_alarm_ids) > 0:
-			raise CycleAttemptError(cycle_alarm_ids)
-
-		chldids = set(p_node.getChildrenIds())
-		parids = set(p_node.getParentIds())
-
 		self.checkIDs(parids)
 		self.checkIDs(chldids)
 
-		lparents = [self.nodes[pid] for pid in parids]
-		lchildren = [self.nodes[cid] for cid in chldids]
+		cycle_alarm_ids = set()
+		# prevent cycles: a child that is also an ancestor of a parent
+		parnums = [self._nums[pid] for pid in parids]
+		chldnums = {self._nums[cid]: cid for cid in chldids}
+		if len(parnums) > 0 and len(chldnums) > 0:
+			for xcnum in self._reaches(self._parents, parnums, set(chldnums.keys())):
+				cycle_alarm_ids.add(chldnums[xcnum])
+				p_node.removeChildId(chldnums[xcnum])
 
-		if len(lparents) > 0:
-			for parnode in lparents:
-				p_node.assertOtherIsParent(parnode)
-		else:
-			if len(chldids) > 0:
-				roots_to_cancel = chldids.intersection(set(self.rootids))
-				for rtc in roots_to_cancel:
-					self.rootids.remove(rtc)
-			self.rootids.append(p_node.ident)
+		if doraise and len(cycle_alarm_ids) > 0:
+			raise CycleAttemptError(cycle_alarm_ids)
 
-		if len(lchildren) > 0:
-			for chldnode in lchildren:
-				p_node.assertOtherIsChild(chldnode)
+		# in given order, which the node id list views will keep
+		chldids = list(dict.fromkeys(p_node.getChildrenIds()))
+		parids = list(dict.fromkeys(p_node.getParentIds()))
 
-		self.nodes[p_node.ident] = p_node
+		num = self._insertNode(p_node)
+		for pid in parids:
+			self._linkNums(self._nums[pid], num)
+		for cid in chldids:
+			self._linkNums(num, self._nums[cid])
+		self.version += 1
 		
 		return self.nodes[p_node.ident]
 
@@ -319,28 +542,254 @@ class DirectedAciclicGraph(object):
 		if p_fromid == p_toid:
 			raise SelfReferenceAttenpt(p_fromid)
 
-		# prevent cycles: upward
-		cycle_alarm_ids = set()
-		for iid in self.iterateUp(start_ident=p_fromid):
-			if p_toid == iid.ident:
-				cycle_alarm_ids.add(p_toid)
-				break
+		fromnum = self._nums[p_fromid]
+		tonum = self._nums[p_toid]
 
-		for iid in self.iterateDown(start_ident=p_toid):
-			if p_fromid == iid.ident:
-				cycle_alarm_ids.add(p_fromid)
-				break
+		# prevent cycles: p_fromid must not be reachable downward from p_toid
+		cycle_alarm_ids = set()
+		if len(self._reaches(self._children, [tonum], {fromnum})) > 0:
+			cycle_alarm_ids.update((p_fromid, p_toid))
 
 		if len(cycle_alarm_ids) > 0:
 			if doraise:
 				raise CycleAttemptError(cycle_alarm_ids)
 		else:
-			fnd = self.nodes[p_fromid]
-			tnd = self.nodes[p_toid]
-			fnd.assertOtherIsChild(tnd)
-			ret = fnd
+			if not tonum in self._children[fromnum]:
+				self._linkNums(fromnum, tonum)
+				self.version += 1
+			ret = self.nodes[p_fromid]
 
 		return ret
+
+	def removeEdge(self, p_fromid: Union[str,int], p_toid: Union[str,int], doraise: Optional[bool] = False) -> bool:
+
+		fromnum = self.getIdentNum(p_fromid, doraise=True)
+		tonum = self.getIdentNum(p_toid, doraise=True)
+
+		if not tonum in self._children[fromnum]:
+			if doraise:
+				raise MissingNodeIDsError((p_fromid, p_toid))
+			return False
+
+		self._unlinkNums(fromnum, tonum)
+		self.version += 1
+
+		return True
+
+	def removeNode(self, p_ident: Union[str,int]) -> BaseGraphNode:
+		"Remove a node and all its edges, its children without other parents become roots"
+
+		num = self.getIdentNum(p_ident, doraise=True)
+		for pnum in list(self._parents[num]):
+			self._unlinkNums(pnum, num)
+		for cnum in list(self._children[num]):
+			self._unlinkNums(num, cnum)
+		ret = self._dropNode(num)
+		self.version += 1
+
+		return ret
+
+	def diff(self, p_other: "DirectedAciclicGraph") -> GraphDiff:
+		"""Changes leading from this graph to p_other: nodes and edges added and removed, and roots changes.
+		Each edge is compared at its child node, skipping nodes whose incoming edge hash is unchanged."""
+
+		if self._structhash == p_other._structhash and len(self.nodes) == len(p_other.nodes):
+			return GraphDiff([], [], [], [], [], [])
+
+		added_nodes = []
+		added_edges = []
+		removed_edges = []
+
+		for ident, onum in p_other._nums.items():
+			num = self._nums.get(ident)
+			oparents = p_other._parents[onum]
+			if num is None:
+				added_nodes.append(ident)
+				added_edges.extend((p_other._idents[pnum], ident) for pnum in oparents)
+				continue
+			if self._adjhash[num] == p_other._adjhash[onum]:
+				continue
+			myparents = {self._idents[pnum] for pnum in self._parents[num]}
+			otherparents = {p_other._idents[pnum] for pnum in oparents}
+			added_edges.extend((pid, ident) for pid in otherparents - myparents)
+			removed_edges.extend((pid, ident) for pid in myparents - otherparents)
+
+		removed_nodes = [ident for ident in self._nums.keys() if not ident in p_other._nums]
+		for ident in removed_nodes:
+			num = self._nums[ident]
+			removed_edges.extend((self._idents[pnum], ident) for pnum in self._parents[num])
+
+		myroots = set(self.rootids)
+		otherroots = set(p_other.rootids)
+
+		return GraphDiff(added_nodes, removed_nodes, added_edges, removed_edges,
+			[ident for ident in p_other.rootids if not ident in myroots],
+			[ident for ident in self.rootids if not ident in otherroots])
+
+	def _cycleNums(self, p_startnums: List[int]) -> List[int]:
+		"""Nodes left over by Kahn's algorithm on the region reachable from p_startnums:
+		any cycle through an edge ending at one of p_startnums lies inside that region."""
+
+		region = set(p_startnums)
+		stack = list(region)
+		while len(stack) > 0:
+			num = stack.pop()
+			for cnum in self._children[num]:
+				if not cnum in region:
+					region.add(cnum)
+					stack.append(cnum)
+
+		pending = {num: sum(1 for pnum in self._parents[num] if pnum in region) for num in region}
+		ready = [num for num, cnt in pending.items() if cnt == 0]
+		while len(ready) > 0:
+			num = ready.pop()
+			del pending[num]
+			for cnum in self._children[num]:
+				pending[cnum] -= 1
+				if pending[cnum] == 0:
+					ready.append(cnum)
+
+		return list(pending.keys())
+
+	def applyDiff(self, p_diff: GraphDiff, nodes: Optional[Dict[Union[str,int], BaseGraphNode]] = None,
+			doraise: Optional[bool] = False) -> Union[None, GraphDiff]:
+		"""Apply a GraphDiff in bulk, with a single acyclicity validation at the end.
+		Added nodes are copies of the ones found in nodes (parent and children lists reset),
+		or plain BaseGraphNode instances. On cycles everything is rolled back and None returned,
+		or CycleAttemptError raised if doraise."""
+
+		# validate everything first, so that errors other than cycles leave the graph untouched
+		removed = {}
+		for ident in p_diff.removed_nodes:
+			self.getIdentNum(ident, doraise=True)
+			removed[ident] = None
+		added = set()
+		for ident in p_diff.added_nodes:
+			if ident in self._nums or ident in added:
+				raise ExistingNodeIdError(ident)
+			added.add(ident)
+		for fromid, toid in p_diff.removed_edges:
+			self.getIdentNum(fromid, doraise=True)
+			self.getIdentNum(toid, doraise=True)
+		for fromid, toid in p_diff.added_edges:
+			for ident in (fromid, toid):
+				if not ident in added and (not ident in self._nums or ident in removed):
+					raise MissingNodeIDsError(ident)
+			if fromid == toid:
+				raise SelfReferenceAttenpt(fromid)
+
+		# adjacency order of nodes losing edges, restored on rollback
+		saved_adjacency = {}
+		removed_edges = []
+
+		def unlink(p_fromnum, p_tonum):
+			for num in (p_fromnum, p_tonum):
+				if not num in saved_adjacency:
+					saved_adjacency[num] = (list(self._parents[num]), list(self._children[num]))
+			self._unlinkNums(p_fromnum, p_tonum)
+			removed_edges.append((p_fromnum, p_tonum))
+
+		for fromid, toid in p_diff.removed_edges:
+			fromnum = self._nums[fromid]
+			tonum = self._nums[toid]
+			if tonum in self._children[fromnum]:
+				unlink(fromnum, tonum)
+
+		removed_nodes = {}
+		for ident in removed:
+			num = self._nums[ident]
+			for pnum in list(self._parents[num]):
+				unlink(pnum, num)
+			for cnum in list(self._children[num]):
+				unlink(num, cnum)
+			removed_nodes[num] = self._dropNode(num)
+
+		added_nums = []
+		for ident in p_diff.added_nodes:
+			if not nodes is None and ident in nodes:
+				newnode = copy(nodes[ident])
+				newnode.parentids = []
+				newnode.childrenids = []
+			else:
+				newnode = BaseGraphNode(ident=ident)
+			added_nums.append(self._insertNode(newnode))
+
+		added_edges = []
+		for fromid, toid in p_diff.added_edges:
+			fromnum = self._nums[fromid]
+			tonum = self._nums[toid]
+			if not tonum in self._children[fromnum]:
+				self._linkNums(fromnum, tonum)
+				added_edges.append((fromnum, tonum))
+
+		cyclenums = self._cycleNums([tonum for _fromnum, tonum in added_edges])
+		if len(cyclenums) > 0:
+			cycle_alarm_ids = {self._idents[num] for num in cyclenums}
+			# roll back, in reverse order; removed nodes get their own numbers
+			# back, so that anything indexed by node number stays valid
+			for fromnum, tonum in reversed(added_edges):
+				self._unlinkNums(fromnum, tonum)
+			for num in reversed(added_nums):
+				self._dropNode(num)
+			for num in reversed(list(removed_nodes.keys())):
+				self._restoreNode(num, removed_nodes[num])
+			for fromnum, tonum in reversed(removed_edges):
+				self._linkNums(fromnum, tonum)
+			for num, (pnums, cnums) in saved_adjacency.items():
+				self._parents[num][:] = pnums
+				self._children[num][:] = cnums
+			if doraise:
+				raise CycleAttemptError(cycle_alarm_ids)
+			return None
+
+		# a diff whose edges and nodes were all already there (or already gone) changes nothing
+		if len(removed_edges) > 0 or len(removed_nodes) > 0 or len(added_nums) > 0 or len(added_edges) > 0:
+			self.version += 1
+
+		return p_diff
+
+	def addEdges(self, p_edges: List[Tuple[Union[str,int], Union[str,int]]]) -> List[Tuple[Union[str,int], Union[str,int]]]:
+		"""Add many edges with as few acyclicity validations as possible, returns the ones rejected
+		for closing a cycle. The result is the same as calling addEdge on each in order.
+
+		The whole batch is validated at once. If it closes a cycle, edges with an endpoint outside
+		the cycle region cannot be on any cycle, so they are committed together; the remaining
+		ones are bisected, so k offending edges cost about k*log(n) validations instead of n.
+		Missing endpoints and self references raise before anything changes."""
+
+		try:
+			self.applyDiff(GraphDiff([], [], p_edges, [], [], []), doraise=True)
+			return []
+		except CycleAttemptError as e:
+			cycleids = e.p_ids
+
+		suspect = []
+		safe = []
+		for edge in p_edges:
+			if edge[0] in cycleids and edge[1] in cycleids:
+				suspect.append(edge)
+			else:
+				safe.append(edge)
+		self.applyDiff(GraphDiff([], [], safe, [], [], []), doraise=True)
+
+		rejected = []
+		# ranges of suspect, left halves first so that earlier edges win, as one by one
+		pending = [(0, len(suspect))]
+		while len(pending) > 0:
+			lo, hi = pending.pop()
+			if self.applyDiff(GraphDiff([], [], suspect[lo:hi], [], [], [])) is None:
+				if hi - lo == 1:
+					rejected.append(suspect[lo])
+				else:
+					mid = (lo + hi) // 2
+					pending.append((mid, hi))
+					pending.append((lo, mid))
+
+		return rejected
+
+	def merge(self, p_other: "DirectedAciclicGraph", doraise: Optional[bool] = False) -> Union[None, GraphDiff]:
+		"Make this graph structurally equal to p_other by applying their diff, returns the diff applied"
+		return self.applyDiff(self.diff(p_other), nodes=p_other.nodes, doraise=doraise)
 		
 		
 
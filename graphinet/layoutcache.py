@@ -0,0 +1,117 @@
+
+import os
+import pickle
+import hashlib
+
+from collections import OrderedDict
+from typing import Optional, Dict, Union, Tuple, Callable
+
+from graphinet.graphinet import DirectedAciclicGraph
+from graphinet.diagramming import BaseLayout, BaseAxis, QuantizedAxis, Pt
+
+def axisSignature(p_axis: BaseAxis) -> Tuple:
+	ret = (type(p_axis).__name__, p_axis.minspace, p_axis.maxspace, p_axis.inverted, p_axis.minv, p_axis.maxv)
+	if isinstance(p_axis, QuantizedAxis):
+		ret = ret + (p_axis.nquantiles,)
+	return ret
+
+def layoutSignature(p_layout: BaseLayout) -> Tuple:
+	"Everything in a layout that influences computed positions: dimensions, origin, outer rim and axes"
+	if p_layout.outer_rim is None:
+		rim = None
+	else:
+		rim = (p_layout.outer_rim.l, p_layout.outer_rim.b, p_layout.outer_rim.r, p_layout.outer_rim.t)
+	return (p_layout.width, p_layout.height, tuple(p_layout.origin), rim,
+		tuple(axisSignature(a) for a in p_layout.xaxis), tuple(axisSignature(a) for a in p_layout.yaxis),
+		p_layout.activeXAxis, p_layout.activeYAxis)
+
+def funcNamespace(p_func: Callable) -> str:
+	"Default cache namespace of a layout function: its module and qualified name"
+	return f"{getattr(p_func, '__module__', None)}.{getattr(p_func, '__qualname__', type(p_func).__qualname__)}"
+
+class LayoutCache(object):
+	"""Layout results (ident -> Pt dicts) keyed by graph structural hash, layout
+	signature and a namespace naming the layout function that produced them.
+	getOrCompute defaults the namespace to the function module and qualified
+	name; pass one explicitly to tell lambdas apart or to version an algorithm,
+	e.g. "sugiyama-v2".
+
+	Entries are kept in memory in LRU order, up to maxsize, and, if cachedir
+	is given, also pickled to disk so that other processes or later runs
+	can load them."""
+
+	def __init__(self, maxsize: Optional[int] = 128, cachedir: Optional[str] = None) -> None:
+		assert maxsize > 0
+		self.maxsize = maxsize
+		self.cachedir = cachedir
+		self.hits = 0
+		self.misses = 0
+		self._entries: OrderedDict = OrderedDict()
+		if not cachedir is None:
+			os.makedirs(cachedir, exist_ok=True)
+
+	def __repr__(self) -> str:
+		return f"layout cache size:{len(self._entries)}/{self.maxsize} hits:{self.hits} misses:{self.misses}"
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	def makeKey(self, p_dag: DirectedAciclicGraph, p_layout: BaseLayout, namespace: Optional[str] = None) -> str:
+		sig = repr((namespace, p_dag.structuralHash(), layoutSignature(p_layout)))
+		return hashlib.blake2b(sig.encode("utf-8"), digest_size=16).hexdigest()
+
+	def _diskPath(self, p_key: str) -> str:
+		return os.path.join(self.cachedir, f"{p_key}.pickle")
+
+	def _remember(self, p_key: str, p_positions: Dict[Union[str,int], Pt]) -> None:
+		self._entries[p_key] = p_positions
+		self._entries.move_to_end(p_key)
+		while len(self._entries) > self.maxsize:
+			self._entries.popitem(last=False)
+
+	def get(self, p_dag: DirectedAciclicGraph, p_layout: BaseLayout,
+			namespace: Optional[str] = None) -> Union[None, Dict[Union[str,int], Pt]]:
+
+		key = self.makeKey(p_dag, p_layout, namespace=namespace)
+		ret = self._entries.get(key)
+		if not ret is None:
+			self._entries.move_to_end(key)
+		elif not self.cachedir is None and os.path.exists(self._diskPath(key)):
+			with open(self._diskPath(key), 'rb') as fl:
+				ret = pickle.load(fl)
+			self._remember(key, ret)
+
+		if ret is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+
+		return ret
+
+	def put(self, p_dag: DirectedAciclicGraph, p_layout: BaseLayout, p_positions: Dict[Union[str,int], Pt],
+			namespace: Optional[str] = None) -> None:
+
+		key = self.makeKey(p_dag, p_layout, namespace=namespace)
+		self._remember(key, p_positions)
+
+		if not self.cachedir is None:
+			# write then rename, readers never see a partial file
+			tmppath = f"{self._diskPath(key)}.{os.getpid()}.tmp"
+			with open(tmppath, 'wb') as fl:
+				pickle.dump(p_positions, fl)
+			os.replace(tmppath, self._diskPath(key))
+
+	def getOrCompute(self, p_dag: DirectedAciclicGraph, p_layout: BaseLayout,
+			p_func: Callable[[DirectedAciclicGraph, BaseLayout], Dict[Union[str,int], Pt]],
+			namespace: Optional[str] = None) -> Dict[Union[str,int], Pt]:
+		"Cached positions, or p_func(p_dag, p_layout) stored for next time, namespace defaults to funcNamespace(p_func)"
+		if namespace is None:
+			namespace = funcNamespace(p_func)
+		ret = self.get(p_dag, p_layout, namespace=namespace)
+		if ret is None:
+			ret = p_func(p_dag, p_layout)
+			self.put(p_dag, p_layout, ret, namespace=namespace)
+		return ret
+
+	def clear(self) -> None:
+		self._entries.clear()
@@ -0,0 +1,203 @@
+
+import os
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict, Union, Tuple, Callable
+
+from graphinet.graphinet import DirectedAciclicGraph
+from graphinet.diagramming import BaseLayout, OuterRim, Pt, QuantizedAxis
+
+# Component adjacency as handed to layout functions: ident -> parent ident list
+Adjacency = Dict[Union[str,int], List[Union[str,int]]]
+# Layout function result: positions, and the layout (at a (0,0) origin) they were projected with
+ComponentResult = Tuple[Dict[Union[str,int], Pt], BaseLayout]
+
+def skylinePack(p_sizes: List[Tuple[Union[float, int], Union[float, int]]],
+		binwidth: Optional[Union[float, int]] = None) -> Tuple[List[Pt], Union[float, int], Union[float, int]]:
+	"""Bottom-left skyline packing of rectangles into a strip of binwidth.
+	Returns each rectangle offset (in input order) and the packed width and height.
+	Without binwidth, the strip is made roughly square."""
+
+	if len(p_sizes) < 1:
+		return [], 0, 0
+
+	maxw = max(w for w, _h in p_sizes)
+	if binwidth is None:
+		area = sum(w * h for w, h in p_sizes)
+		binwidth = max(maxw, area ** 0.5)
+	binwidth = max(binwidth, maxw)
+
+	# skyline: list of [x, y, width] segments, left to right, covering [0, binwidth]
+	skyline = [[0, 0, binwidth]]
+	offsets = [None] * len(p_sizes)
+	order = sorted(range(len(p_sizes)), key=lambda idx: (-p_sizes[idx][1], -p_sizes[idx][0]))
+
+	for idx in order:
+		w, h = p_sizes[idx]
+		bestidx = None
+		besty = None
+		for sidx in range(len(skyline)):
+			x = skyline[sidx][0]
+			if x + w > binwidth:
+				break
+			# resting height: highest segment under [x, x+w]
+			y = 0
+			span = 0
+			j = sidx
+			while span < w and j < len(skyline):
+				y = max(y, skyline[j][1])
+				span += skyline[j][2]
+				j += 1
+			if besty is None or y < besty:
+				bestidx, besty = sidx, y
+		x = skyline[bestidx][0]
+		offsets[idx] = Pt(x, besty)
+
+		# replace covered segments by the new top, keeping any partially covered remainder
+		newseg = [x, besty + h, w]
+		j = bestidx
+		remaining = w
+		while remaining > 0 and j < len(skyline):
+			seg = skyline[j]
+			if seg[2] <= remaining:
+				remaining -= seg[2]
+				del skyline[j]
+			else:
+				seg[0] += remaining
+				seg[2] -= remaining
+				remaining = 0
+		skyline.insert(bestidx, newseg)
+
+		# merge neighbours at the same height
+		merged = [skyline[0]]
+		for seg in skyline[1:]:
+			if seg[1] == merged[-1][1]:
+				merged[-1][2] += seg[2]
+			else:
+				merged.append(seg)
+		skyline = merged
+
+	width = max(offsets[idx].x + p_sizes[idx][0] for idx in range(len(p_sizes)))
+	height = max(offsets[idx].y + p_sizes[idx][1] for idx in range(len(p_sizes)))
+
+	return offsets, width, height
+
+def relocatedLayout(p_layout: BaseLayout, p_origin: Pt) -> BaseLayout:
+	"""Copy of p_layout placed at p_origin: same dimensions, rim and axes (types, quantiles,
+	inversion and values domains), so the same values project to positions shifted by the origin change"""
+
+	ret = BaseLayout(p_layout.width, p_layout.height, origin=p_origin)
+	if not p_layout.outer_rim is None:
+		rim = p_layout.outer_rim
+		ret.setOuterRim(OuterRim(left=rim.l, bottom=rim.b, right=rim.r, top=rim.t))
+	for is_x, axes in ((True, p_layout.xaxis), (False, p_layout.yaxis)):
+		for axis in axes:
+			if isinstance(axis, QuantizedAxis):
+				if is_x:
+					newaxis = ret.addQuantizedXAxis(axis.nquantiles)
+				else:
+					newaxis = ret.addQuantizedYAxis(axis.nquantiles, invert=axis.inverted)
+			else:
+				if is_x:
+					newaxis = ret.addLinearXAxis()
+				else:
+					newaxis = ret.addLinearYAxis(invert=axis.inverted)
+			if not axis.minv is None:
+				newaxis.setValuesDomainSize(axis.minv, axis.sizev)
+	ret.activeXAxis = p_layout.activeXAxis
+	ret.activeYAxis = p_layout.activeYAxis
+
+	return ret
+
+def layeredComponentLayout(p_adjacency: Adjacency, cellw: Optional[Union[float, int]] = 40,
+		cellh: Optional[Union[float, int]] = 40, rim: Optional[Union[float, int]] = 10) -> ComponentResult:
+	"""Longest path layering: y quantile is the node depth, x quantile its rank within the layer.
+	Positions come from quantized axes of a BaseLayout sized to the component."""
+
+	depth = {}
+	pending = {ident: len(pids) for ident, pids in p_adjacency.items()}
+	children = {ident: [] for ident in p_adjacency.keys()}
+	for ident, pids in p_adjacency.items():
+		for pid in pids:
+			children[pid].append(ident)
+	ready = [ident for ident, cnt in pending.items() if cnt == 0]
+	for ident in ready:
+		depth[ident] = 0
+	while len(ready) > 0:
+		ident = ready.pop()
+		for cid in children[ident]:
+			depth[cid] = max(depth.get(cid, 0), depth[ident] + 1)
+			pending[cid] -= 1
+			if pending[cid] == 0:
+				ready.append(cid)
+
+	layers: List[List[Union[str,int]]] = []
+	for ident in sorted(depth.keys(), key=str):
+		d = depth[ident]
+		while len(layers) <= d:
+			layers.append([])
+		layers[d].append(ident)
+
+	ncols = max(len(lyr) for lyr in layers)
+	bl = BaseLayout(ncols * cellw + 2 * rim, len(layers) * cellh + 2 * rim)
+	bl.setOuterRim(OuterRim(all=rim))
+	bl.addQuantizedXAxis(ncols).setIdentValuesDomain()
+	bl.addQuantizedYAxis(len(layers)).setIdentValuesDomain()
+
+	positions = {}
+	for d, lyr in enumerate(layers):
+		for col, ident in enumerate(lyr):
+			positions[ident] = bl.getPosition(Pt(col, d), fromquantile=True)
+
+	return positions, bl
+
+def _layoutChunk(p_args: Tuple[Callable, List[Adjacency], Dict]) -> List[ComponentResult]:
+	layoutfunc, adjacencies, kwargs = p_args
+	return [layoutfunc(adj, **kwargs) for adj in adjacencies]
+
+class PackedLayout(object):
+	"Result of parallelLayout: one sub-layout per component plus the packed canvas"
+
+	def __init__(self, p_width: Union[float, int], p_height: Union[float, int]) -> None:
+		self.canvas = BaseLayout(p_width, p_height)
+		self.components: List[List[Union[str,int]]] = []
+		self.layouts: List[BaseLayout] = []
+		self.positions: Dict[Union[str,int], Pt] = {}
+
+	def __repr__(self) -> str:
+		return f"packed {self.canvas} components:{len(self.components)}"
+
+def parallelLayout(p_dag: DirectedAciclicGraph,
+		layoutfunc: Optional[Callable[..., ComponentResult]] = layeredComponentLayout,
+		binwidth: Optional[Union[float, int]] = None,
+		maxworkers: Optional[int] = None,
+		chunksize: Optional[int] = 64,
+		**kwargs) -> PackedLayout:
+	"""Lay out each weakly connected component on its own, in a process pool,
+	then skyline-pack the component boxes into a single canvas.
+	layoutfunc must be picklable (module level) and receives the component
+	adjacency plus kwargs; maxworkers=1 runs everything in this process.
+	Each component layout is returned relocated to its packed offset."""
+
+	comps = p_dag.weaklyConnectedComponents()
+	adjacencies = [{ident: list(p_dag.nodes[ident].parentids) for ident in comp} for comp in comps]
+	chunks = [(layoutfunc, adjacencies[idx:idx+chunksize], kwargs) for idx in range(0, len(adjacencies), chunksize)]
+
+	if maxworkers is None:
+		maxworkers = os.cpu_count() or 1
+	if maxworkers < 2 or len(chunks) < 2:
+		results = [res for chunk in chunks for res in _layoutChunk(chunk)]
+	else:
+		with ProcessPoolExecutor(max_workers=maxworkers) as executor:
+			results = [res for chunkres in executor.map(_layoutChunk, chunks) for res in chunkres]
+
+	offsets, width, height = skylinePack([bl.getDims() for _pos, bl in results], binwidth=binwidth)
+
+	ret = PackedLayout(width, height)
+	ret.components = comps
+	for (positions, bl), offset in zip(results, offsets):
+		ret.layouts.append(relocatedLayout(bl, offset))
+		for ident, pt in positions.items():
+			ret.positions[ident] = Pt(pt.x + offset.x, pt.y + offset.y)
+
+	return ret
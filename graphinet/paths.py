@@ -0,0 +1,129 @@
+
+import heapq
+
+from typing import Optional, List, Dict, Union, Tuple, Callable, Iterator
+
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode
+
+def _regionOrder(p_startnums: List[int], p_adjacency: Callable[[int], List[int]],
+		p_reverse: Callable[[int], List[int]]) -> List[int]:
+	"Topological order (along p_adjacency) of the nodes reachable from p_startnums"
+
+	region = set(p_startnums)
+	stack = list(region)
+	while len(stack) > 0:
+		num = stack.pop()
+		for onum in p_adjacency(num):
+			if not onum in region:
+				region.add(onum)
+				stack.append(onum)
+
+	pending = {num: sum(1 for pnum in p_reverse(num) if pnum in region) for num in region}
+	ret = [num for num, cnt in pending.items() if cnt == 0]
+	idx = 0
+	while idx < len(ret):
+		for onum in p_adjacency(ret[idx]):
+			pending[onum] -= 1
+			if pending[onum] == 0:
+				ret.append(onum)
+		idx += 1
+
+	return ret
+
+def pathCounts(p_dag: DirectedAciclicGraph, source: Optional[Union[str,int]] = None,
+		modulus: Optional[int] = None) -> Dict[Union[str,int], int]:
+	"""Number of distinct paths reaching each node, from source or, if not given, from any root.
+	Counts are exact Python ints unless a modulus is given. Sources count one (empty) path."""
+
+	if source is None:
+		startnums = p_dag.rootNums()
+	else:
+		startnums = [p_dag.getIdentNum(source, doraise=True)]
+
+	order = _regionOrder(startnums, p_dag.childNums, p_dag.parentNums)
+	counts = {num: 0 for num in order}
+	for num in startnums:
+		counts[num] = 1
+	for num in order:
+		cnt = counts[num]
+		if cnt == 0:
+			continue
+		for cnum in p_dag.childNums(num):
+			if modulus is None:
+				counts[cnum] += cnt
+			else:
+				counts[cnum] = (counts[cnum] + cnt) % modulus
+
+	return {p_dag.getNumIdent(num): cnt for num, cnt in counts.items()}
+
+def countPaths(p_dag: DirectedAciclicGraph, p_target: Union[str,int], source: Optional[Union[str,int]] = None,
+		modulus: Optional[int] = None) -> int:
+	"Number of distinct paths from source (or from any root) to p_target"
+	p_dag.getIdentNum(p_target, doraise=True)
+	return pathCounts(p_dag, source=source, modulus=modulus).get(p_target, 0)
+
+def _unitWeight(p_from: BaseGraphNode, p_to: BaseGraphNode) -> Union[float, int]:
+	return 1
+
+def kShortestPaths(p_dag: DirectedAciclicGraph, p_source: Union[str,int], p_target: Union[str,int],
+		weight: Optional[Callable[[BaseGraphNode, BaseGraphNode], Union[float, int]]] = None
+		) -> Iterator[Tuple[Union[float, int], List[Union[str,int]]]]:
+	"""Lazily yield (cost, ident path) from p_source to p_target, cheapest first.
+
+	Exact distances to p_target are first computed by dynamic programming in
+	reverse topological order; paths are then grown best-first using those
+	distances as heuristic. Being exact, every expansion lies on a path to
+	be yielded, so taking the first k paths costs about k times the path
+	length times the fan-out, whatever the total number of paths.
+	weight(from_node, to_node) defaults to 1 per edge (negative weights are fine)."""
+
+	if weight is None:
+		weight = _unitWeight
+
+	srcnum = p_dag.getIdentNum(p_source, doraise=True)
+	tgtnum = p_dag.getIdentNum(p_target, doraise=True)
+	ident = p_dag.getNumIdent
+	nodes = p_dag.nodes
+
+	# nodes that can reach the target, ordered from the target upwards
+	order = _regionOrder([tgtnum], p_dag.parentNums, p_dag.childNums)
+	edgew = {}
+	dist = {tgtnum: 0}
+	for num in order:
+		if num == tgtnum:
+			continue
+		best = None
+		for cnum in p_dag.childNums(num):
+			if not cnum in dist:
+				continue
+			w = weight(nodes[ident(num)], nodes[ident(cnum)])
+			edgew[(num, cnum)] = w
+			if best is None or w + dist[cnum] < best:
+				best = w + dist[cnum]
+		dist[num] = best
+
+	if not srcnum in dist:
+		return
+
+	# partial paths as (num, previous partial) linked tuples, shared between heap entries;
+	# the heuristic being exact, partial paths tie on f, so ties go to the deepest
+	# partial first, otherwise all prefixes would be expanded breadth-first
+	seq = 0
+	fringe = [(dist[srcnum], 0, seq, 0, (srcnum, None))]
+	while len(fringe) > 0:
+		f, negdepth, _seq, g, partial = heapq.heappop(fringe)
+		num = partial[0]
+		if num == tgtnum:
+			path = []
+			while not partial is None:
+				path.append(ident(partial[0]))
+				partial = partial[1]
+			path.reverse()
+			yield f, path
+			continue
+		for cnum in p_dag.childNums(num):
+			if not cnum in dist:
+				continue
+			ng = g + edgew[(num, cnum)]
+			seq += 1
+			heapq.heappush(fringe, (ng + dist[cnum], negdepth - 1, seq, ng, (cnum, partial)))
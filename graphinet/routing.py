@@ -0,0 +1,351 @@
+
+import heapq
+
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from math import floor
+from typing import Optional, List, Dict, Union, Tuple, Iterable
+
+from graphinet.diagramming import Pt, Rect
+
+# A* search directions
+EAST = 0
+NORTH = 1
+WEST = 2
+SOUTH = 3
+
+class MissingObstacleError(RuntimeError):
+	def __init__(self, p_id):
+		self.p_id = p_id
+	def __str__(self):
+		return f"Missing obstacle (node box) for id: {self.p_id}"
+
+class NoRouteFound(RuntimeError):
+	def __init__(self, p_fromid, p_toid):
+		self.fromid = p_fromid
+		self.toid = p_toid
+	def __str__(self):
+		return f"No orthogonal route found from {self.fromid} to {self.toid}"
+
+def rectsIntersect(p_a: Rect, p_b: Rect) -> bool:
+	return p_a.minx <= p_b.maxx and p_b.minx <= p_a.maxx and \
+		p_a.miny <= p_b.maxy and p_b.miny <= p_a.maxy
+
+def rectCenter(p_rect: Rect) -> Pt:
+	return Pt((p_rect.minx + p_rect.maxx) / 2.0, (p_rect.miny + p_rect.maxy) / 2.0)
+
+def expandRect(p_rect: Rect, p_by: Union[float, int]) -> Rect:
+	return Rect(p_rect.minx - p_by, p_rect.miny - p_by, p_rect.maxx + p_by, p_rect.maxy + p_by)
+
+class OrthogonalRouter(object):
+	"""Routes edges orthogonally around node boxes.
+
+	Each edge is searched with A* over a sparse visibility grid, built only
+	from the obstacle borders (inflated by margin) found inside a corridor
+	around the edge endpoints; the corridor grows if no route exists in it.
+	Segments lying on channels already used by other routes cost
+	share_factor times their length, so parallel edges bundle together.
+	Routes are cached by endpoints and corridor obstacle geometry, in LRU
+	order up to cachesize entries, and changing an obstacle only marks as
+	dirty the routes whose corridor it touches, to be recomputed by reroute()."""
+
+	def __init__(self, margin: Optional[Union[float, int]] = 10,
+			bend_penalty: Optional[Union[float, int]] = 20,
+			share_factor: Optional[float] = 0.8,
+			cellsize: Optional[Union[float, int]] = 200,
+			maxexpansions: Optional[int] = 6,
+			cachesize: Optional[int] = 1024) -> None:
+		assert 0 < share_factor <= 1.0
+		assert cachesize > 0
+		self.margin = margin
+		self.bend_penalty = bend_penalty
+		self.share_factor = share_factor
+		self.cellsize = cellsize
+		self.maxexpansions = maxexpansions
+		self.cachesize = cachesize
+		self.obstacles: Dict[Union[str,int], Rect] = {}
+		self.routes: Dict[Tuple[Union[str,int], Union[str,int]], List[Pt]] = {}
+		self._obscells: Dict[Tuple[int, int], set] = {}
+		self._corridors: Dict[Tuple[Union[str,int], Union[str,int]], Rect] = {}
+		self._corridorcells: Dict[Tuple[int, int], set] = {}
+		self._edgesof: Dict[Union[str,int], set] = {}
+		self._dirty = set()
+		self._cache: OrderedDict = OrderedDict()
+		# used channels: horizontal line y -> x intervals, vertical line x -> y intervals
+		self._hlines: Dict[float, List[Tuple[float, float]]] = {}
+		self._vlines: Dict[float, List[Tuple[float, float]]] = {}
+		self._hkeys: List[float] = []
+		self._vkeys: List[float] = []
+
+	def __repr__(self) -> str:
+		return f"orthogonal router obstacles:{len(self.obstacles)} routes:{len(self.routes)} dirty:{len(self._dirty)}"
+
+	def _cellsOf(self, p_rect: Rect) -> Iterable[Tuple[int, int]]:
+		cs = self.cellsize
+		for cx in range(floor(p_rect.minx / cs), floor(p_rect.maxx / cs)+1):
+			for cy in range(floor(p_rect.miny / cs), floor(p_rect.maxy / cs)+1):
+				yield (cx, cy)
+
+	def _markTouched(self, p_rect: Rect) -> None:
+		for key in self._cellsOf(p_rect):
+			for ekey in self._corridorcells.get(key, ()):
+				if rectsIntersect(self._corridors[ekey], p_rect):
+					self._dirty.add(ekey)
+
+	def setObstacle(self, p_ident: Union[str,int], p_rect: Rect) -> None:
+		"Add or move a node box, marking routes whose corridor it touches"
+		oldrect = self.obstacles.get(p_ident)
+		if oldrect == p_rect:
+			return
+		if not oldrect is None:
+			self.removeObstacle(p_ident)
+		self.obstacles[p_ident] = p_rect
+		for key in self._cellsOf(p_rect):
+			self._obscells.setdefault(key, set()).add(p_ident)
+		self._markTouched(expandRect(p_rect, self.margin))
+		self._dirty.update(self._edgesof.get(p_ident, ()))
+
+	def removeObstacle(self, p_ident: Union[str,int]) -> None:
+		rect = self.obstacles.pop(p_ident, None)
+		if rect is None:
+			return
+		for key in self._cellsOf(rect):
+			bucket = self._obscells.get(key)
+			if not bucket is None:
+				bucket.discard(p_ident)
+				if len(bucket) < 1:
+					del self._obscells[key]
+		self._markTouched(expandRect(rect, self.margin))
+
+	def _obstaclesIn(self, p_rect: Rect, p_exclude: Tuple) -> List[Rect]:
+		found = set()
+		for key in self._cellsOf(p_rect):
+			found.update(self._obscells.get(key, ()))
+		ret = []
+		for ident in found:
+			if ident in p_exclude:
+				continue
+			r = expandRect(self.obstacles[ident], self.margin)
+			if rectsIntersect(r, p_rect):
+				ret.append(r)
+		ret.sort()
+		return ret
+
+	def _linesIn(self, p_keys: List[float], p_min: float, p_max: float) -> List[float]:
+		return p_keys[bisect_left(p_keys, p_min):bisect_right(p_keys, p_max)]
+
+	def _isShared(self, p_lines: Dict, p_at: float, p_a: float, p_b: float) -> bool:
+		lo, hi = min(p_a, p_b), max(p_a, p_b)
+		for ia, ib in p_lines.get(p_at, ()):
+			if ia <= lo and hi <= ib:
+				return True
+		return False
+
+	def _addChannels(self, p_path: List[Pt]) -> None:
+		for a, b in zip(p_path[:-1], p_path[1:]):
+			if a.y == b.y:
+				if not a.y in self._hlines:
+					insort(self._hkeys, a.y)
+				self._hlines.setdefault(a.y, []).append((min(a.x, b.x), max(a.x, b.x)))
+			else:
+				if not a.x in self._vlines:
+					insort(self._vkeys, a.x)
+				self._vlines.setdefault(a.x, []).append((min(a.y, b.y), max(a.y, b.y)))
+
+	def _removeChannels(self, p_path: List[Pt]) -> None:
+		for a, b in zip(p_path[:-1], p_path[1:]):
+			if a.y == b.y:
+				lines, keys, at, iv = self._hlines, self._hkeys, a.y, (min(a.x, b.x), max(a.x, b.x))
+			else:
+				lines, keys, at, iv = self._vlines, self._vkeys, a.x, (min(a.y, b.y), max(a.y, b.y))
+			lst = lines.get(at)
+			if lst is None or not iv in lst:
+				continue
+			lst.remove(iv)
+			if len(lst) < 1:
+				del lines[at]
+				del keys[bisect_left(keys, at)]
+
+	def _search(self, p_src: Pt, p_dst: Pt, p_corridor: Rect, p_obstacles: List[Rect]) -> Union[None, List[Pt]]:
+
+		xs = {p_src.x, p_dst.x, p_corridor.minx, p_corridor.maxx}
+		ys = {p_src.y, p_dst.y, p_corridor.miny, p_corridor.maxy}
+		for r in p_obstacles:
+			xs.update((r.minx, r.maxx))
+			ys.update((r.miny, r.maxy))
+		xs.update(self._linesIn(self._vkeys, p_corridor.minx, p_corridor.maxx))
+		ys.update(self._linesIn(self._hkeys, p_corridor.miny, p_corridor.maxy))
+		xs = sorted(x for x in xs if p_corridor.minx <= x <= p_corridor.maxx)
+		ys = sorted(y for y in ys if p_corridor.miny <= y <= p_corridor.maxy)
+
+		# grid lines include every obstacle border, so each obstacle blocks whole index ranges of steps:
+		# hblocked[j*nx+i] for (i,j) -> (i+1,j), vblocked[i*ny+j] for (i,j) -> (i,j+1)
+		nx, ny = len(xs), len(ys)
+		hblocked = bytearray(nx * ny)
+		vblocked = bytearray(nx * ny)
+		ones = b"\x01" * max(nx, ny)
+		for r in p_obstacles:
+			i0, i1 = bisect_left(xs, r.minx), bisect_right(xs, r.maxx) - 1
+			j0, j1 = bisect_left(ys, r.miny), bisect_right(ys, r.maxy) - 1
+			# grid lines strictly inside the obstacle
+			for j in range(bisect_right(ys, r.miny), bisect_left(ys, r.maxy)):
+				if i1 > i0:
+					hblocked[j*nx+i0:j*nx+i1] = ones[:i1-i0]
+			for i in range(bisect_right(xs, r.minx), bisect_left(xs, r.maxx)):
+				if j1 > j0:
+					vblocked[i*ny+j0:i*ny+j1] = ones[:j1-j0]
+
+		xidx = {x: i for i, x in enumerate(xs)}
+		yidx = {y: j for j, y in enumerate(ys)}
+		start = (xidx[p_src.x], yidx[p_src.y])
+		goal = (xidx[p_dst.x], yidx[p_dst.y])
+		steps = ((1, 0, EAST), (0, 1, NORTH), (-1, 0, WEST), (0, -1, SOUTH))
+
+		def heuristic(p_i, p_j):
+			return self.share_factor * (abs(xs[p_i] - p_dst.x) + abs(ys[p_j] - p_dst.y))
+
+		fringe = [(heuristic(*start), 0.0, 0, start, -1)]
+		best = {(start, -1): 0.0}
+		came = {}
+		seq = 0
+		while len(fringe) > 0:
+			_f, g, _seq, cell, d = heapq.heappop(fringe)
+			if cell == goal:
+				path = [Pt(xs[cell[0]], ys[cell[1]])]
+				state = (cell, d)
+				while state in came:
+					state = came[state]
+					path.append(Pt(xs[state[0][0]], ys[state[0][1]]))
+				path.reverse()
+				return path
+			if g > best.get((cell, d), g):
+				continue
+			i, j = cell
+			for di, dj, nd in steps:
+				ni, nj = i + di, j + dj
+				if ni < 0 or nj < 0 or ni >= len(xs) or nj >= len(ys):
+					continue
+				if di != 0:
+					if hblocked[j*nx+min(i, ni)]:
+						continue
+				elif vblocked[i*ny+min(j, nj)]:
+					continue
+				x0, y0, x1, y1 = xs[i], ys[j], xs[ni], ys[nj]
+				if di != 0:
+					shared = self._isShared(self._hlines, y0, x0, x1)
+				else:
+					shared = self._isShared(self._vlines, x0, y0, y1)
+				step = abs(x1 - x0) + abs(y1 - y0)
+				ng = g + step * (self.share_factor if shared else 1.0)
+				if d >= 0 and d != nd:
+					ng += self.bend_penalty
+				nstate = ((ni, nj), nd)
+				if ng < best.get(nstate, float("inf")):
+					best[nstate] = ng
+					came[nstate] = (cell, d)
+					seq += 1
+					heapq.heappush(fringe, (ng + heuristic(ni, nj), ng, seq, (ni, nj), nd))
+
+		return None
+
+	def route(self, p_fromid: Union[str,int], p_toid: Union[str,int], doraise: Optional[bool] = False) -> List[Pt]:
+		"Route (or re-route) one edge between the centers of two node boxes"
+
+		for ident in (p_fromid, p_toid):
+			if not ident in self.obstacles:
+				raise MissingObstacleError(ident)
+
+		ekey = (p_fromid, p_toid)
+		self._forget(ekey)
+
+		src = rectCenter(self.obstacles[p_fromid])
+		dst = rectCenter(self.obstacles[p_toid])
+		pad = 4 * self.margin
+		corridor = Rect(min(src.x, dst.x) - pad, min(src.y, dst.y) - pad, max(src.x, dst.x) + pad, max(src.y, dst.y) + pad)
+
+		path = None
+		for _attempt in range(self.maxexpansions + 1):
+			obstacles = self._obstaclesIn(corridor, ekey)
+			ckey = (src, dst, corridor, tuple(obstacles))
+			path = self._cache.get(ckey)
+			if not path is None:
+				self._cache.move_to_end(ckey)
+			else:
+				path = self._search(src, dst, corridor, obstacles)
+				if not path is None:
+					path = self._simplify(path)
+					self._cache[ckey] = path
+					while len(self._cache) > self.cachesize:
+						self._cache.popitem(last=False)
+			if not path is None:
+				break
+			grow = max(corridor.maxx - corridor.minx, corridor.maxy - corridor.miny) / 2.0
+			corridor = expandRect(corridor, grow)
+
+		if path is None:
+			if doraise:
+				raise NoRouteFound(p_fromid, p_toid)
+			path = [src, dst]
+
+		self.routes[ekey] = path
+		self._corridors[ekey] = corridor
+		for ident in ekey:
+			self._edgesof.setdefault(ident, set()).add(ekey)
+		for key in self._cellsOf(corridor):
+			self._corridorcells.setdefault(key, set()).add(ekey)
+		self._addChannels(path)
+
+		return path
+
+	def _forget(self, p_ekey: Tuple) -> None:
+		self._dirty.discard(p_ekey)
+		oldpath = self.routes.pop(p_ekey, None)
+		if not oldpath is None:
+			self._removeChannels(oldpath)
+			for ident in p_ekey:
+				self._edgesof[ident].discard(p_ekey)
+		corridor = self._corridors.pop(p_ekey, None)
+		if not corridor is None:
+			for key in self._cellsOf(corridor):
+				bucket = self._corridorcells.get(key)
+				if not bucket is None:
+					bucket.discard(p_ekey)
+					if len(bucket) < 1:
+						del self._corridorcells[key]
+
+	def _simplify(self, p_path: List[Pt]) -> List[Pt]:
+		"Drop collinear intermediate points, keeping only bends"
+		ret = [p_path[0]]
+		for idx in range(1, len(p_path) - 1):
+			a, b, c = ret[-1], p_path[idx], p_path[idx+1]
+			if (a.x == b.x == c.x) or (a.y == b.y == c.y):
+				continue
+			ret.append(b)
+		if len(p_path) > 1:
+			ret.append(p_path[-1])
+		return ret
+
+	def addEdge(self, p_fromid: Union[str,int], p_toid: Union[str,int]) -> None:
+		"Register an edge to be routed on next reroute()"
+		self._dirty.add((p_fromid, p_toid))
+
+	def removeEdge(self, p_fromid: Union[str,int], p_toid: Union[str,int]) -> None:
+		self._forget((p_fromid, p_toid))
+
+	def getRoute(self, p_fromid: Union[str,int], p_toid: Union[str,int]) -> Union[None, List[Pt]]:
+		return self.routes.get((p_fromid, p_toid))
+
+	def getDirty(self) -> List[Tuple[Union[str,int], Union[str,int]]]:
+		return sorted(self._dirty, key=str)
+
+	def reroute(self, doraise: Optional[bool] = False) -> int:
+		"Route every dirty edge (new or touched by an obstacle change), returns how many were routed"
+		todo = []
+		for ekey in self.getDirty():
+			if ekey[0] in self.obstacles and ekey[1] in self.obstacles:
+				todo.append(ekey)
+			else:
+				self._forget(ekey)
+		for fromid, toid in todo:
+			self.route(fromid, toid, doraise=doraise)
+		return len(todo)
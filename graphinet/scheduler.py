@@ -0,0 +1,188 @@
+
+import heapq
+import asyncio
+import threading
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from enum import IntEnum
+from typing import Optional, Dict, Union, Callable, Any
+
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode
+
+class ExecutorType(IntEnum):
+	THREAD = 0
+	PROCESS = 2
+	ASYNCIO = 4
+
+class TaskState(IntEnum):
+	PENDING = 0
+	RUNNING = 1
+	DONE = 2
+	FAILED = 4
+	SKIPPED = 6
+	CANCELLED = 8
+
+TaskResult = namedtuple("TaskResult", "state value error")
+
+class InvalidExecutorType(RuntimeError):
+	def __init__(self, p_type):
+		self.the_type = p_type
+	def __str__(self):
+		return f"Invalid executor type: {self.the_type}"
+
+class DAGExecutor(object):
+	"""Runs p_func(node) for every node of a DAG, each as soon as all its parents are done.
+
+	Readiness is tracked with per node pending-parent counters. Among ready
+	nodes, the ones heading the longest remaining (critical) path, as
+	measured by the cost callable, are started first. A failing node marks
+	all its descendants as SKIPPED, cancel() stops starting new nodes.
+	With ExecutorType.PROCESS, p_func must be picklable; with
+	ExecutorType.ASYNCIO it may be a coroutine function."""
+
+	def __init__(self, p_dag: DirectedAciclicGraph, p_func: Callable[[BaseGraphNode], Any],
+			executortype: Optional[ExecutorType] = ExecutorType.THREAD,
+			maxworkers: Optional[int] = 4,
+			cost: Optional[Callable[[BaseGraphNode], Union[float, int]]] = None) -> None:
+		if not executortype in (ExecutorType.THREAD, ExecutorType.PROCESS, ExecutorType.ASYNCIO):
+			raise InvalidExecutorType(executortype)
+		assert maxworkers > 0
+		self.dag = p_dag
+		self.func = p_func
+		self.executortype = executortype
+		self.maxworkers = maxworkers
+		self.cost = cost
+		self.results: Dict[Union[str,int], TaskResult] = {}
+		self._cancelled = threading.Event()
+
+	def __repr__(self) -> str:
+		return f"dag executor type:{self.executortype.name} maxworkers:{self.maxworkers}"
+
+	def cancel(self) -> None:
+		"Do not start any more nodes, running ones are left to finish"
+		self._cancelled.set()
+
+	def _prepare(self) -> None:
+
+		dag = self.dag
+		order = dag.topologicalNums()
+		self._state = {num: TaskState.PENDING for num in order}
+		self._pending = {num: len(dag.parentNums(num)) for num in order}
+
+		# critical path rank: own cost plus the heaviest rank among children
+		self._rank = {}
+		for num in reversed(order):
+			if self.cost is None:
+				own = 1
+			else:
+				own = self.cost(dag.nodes[dag.getNumIdent(num)])
+			self._rank[num] = own + max((self._rank[cnum] for cnum in dag.childNums(num)), default=0)
+
+		self._ready = []
+		for num in order:
+			if self._pending[num] == 0:
+				heapq.heappush(self._ready, (-self._rank[num], num))
+
+		self.results = {}
+
+	def _popReady(self) -> Union[None, int]:
+		while len(self._ready) > 0:
+			_rank, num = heapq.heappop(self._ready)
+			if self._state[num] == TaskState.PENDING:
+				self._state[num] = TaskState.RUNNING
+				return num
+		return None
+
+	def _setResult(self, p_num: int, p_state: TaskState, value: Optional[Any] = None, error: Optional[BaseException] = None) -> None:
+		self._state[p_num] = p_state
+		self.results[self.dag.getNumIdent(p_num)] = TaskResult(p_state, value, error)
+
+	def _done(self, p_num: int, p_value: Any) -> None:
+		self._setResult(p_num, TaskState.DONE, value=p_value)
+		for cnum in self.dag.childNums(p_num):
+			self._pending[cnum] -= 1
+			if self._pending[cnum] == 0 and self._state[cnum] == TaskState.PENDING:
+				heapq.heappush(self._ready, (-self._rank[cnum], cnum))
+
+	def _failed(self, p_num: int, p_error: BaseException) -> None:
+		self._setResult(p_num, TaskState.FAILED, error=p_error)
+		stack = list(self.dag.childNums(p_num))
+		while len(stack) > 0:
+			num = stack.pop()
+			if self._state[num] != TaskState.PENDING:
+				continue
+			self._setResult(num, TaskState.SKIPPED)
+			stack.extend(self.dag.childNums(num))
+
+	def _finish(self) -> Dict[Union[str,int], TaskResult]:
+		for num, state in self._state.items():
+			if state == TaskState.PENDING:
+				self._setResult(num, TaskState.CANCELLED)
+		return self.results
+
+	def run(self) -> Dict[Union[str,int], TaskResult]:
+		"Run every node, returns a TaskResult per node ident"
+
+		if self.executortype == ExecutorType.ASYNCIO:
+			return asyncio.run(self.runAsync())
+
+		self._prepare()
+		if self.executortype == ExecutorType.PROCESS:
+			poolclass = ProcessPoolExecutor
+		else:
+			poolclass = ThreadPoolExecutor
+
+		running = {}
+		with poolclass(max_workers=self.maxworkers) as executor:
+			while True:
+				while len(running) < self.maxworkers and not self._cancelled.is_set():
+					num = self._popReady()
+					if num is None:
+						break
+					node = self.dag.nodes[self.dag.getNumIdent(num)]
+					running[executor.submit(self.func, node)] = num
+				if len(running) < 1:
+					break
+				finished, _notfinished = wait(running.keys(), return_when=FIRST_COMPLETED)
+				for fut in finished:
+					num = running.pop(fut)
+					exc = fut.exception()
+					if exc is None:
+						self._done(num, fut.result())
+					else:
+						self._failed(num, exc)
+
+		return self._finish()
+
+	async def runAsync(self) -> Dict[Union[str,int], TaskResult]:
+		"Same as run, on the running event loop; plain callables go to the default executor"
+
+		self._prepare()
+		loop = asyncio.get_running_loop()
+		iscoro = asyncio.iscoroutinefunction(self.func)
+
+		running = {}
+		while True:
+			while len(running) < self.maxworkers and not self._cancelled.is_set():
+				num = self._popReady()
+				if num is None:
+					break
+				node = self.dag.nodes[self.dag.getNumIdent(num)]
+				if iscoro:
+					task = asyncio.ensure_future(self.func(node))
+				else:
+					task = loop.run_in_executor(None, self.func, node)
+				running[task] = num
+			if len(running) < 1:
+				break
+			finished, _notfinished = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+			for task in finished:
+				num = running.pop(task)
+				exc = task.exception()
+				if exc is None:
+					self._done(num, task.result())
+				else:
+					self._failed(num, exc)
+
+		return self._finish()
@@ -0,0 +1,196 @@
+
+import heapq
+
+from math import floor, sqrt
+from typing import Optional, List, Dict, Union, Tuple, Iterable
+
+from graphinet.diagramming import BaseLayout, QuantizedAxis, Pt, Rect
+
+class InvalidCellSize(RuntimeError):
+	def __init__(self, p_size):
+		self.size = p_size
+	def __str__(self):
+		return f"Invalid spatial index cell size: {self.size}"
+
+class GridSpatialIndex(object):
+	"""Uniform grid over laid-out node positions.
+
+	Each ident lives in exactly one square cell, so point and rectangle
+	queries only visit the cells they overlap and moving a node is a
+	constant time bucket swap."""
+
+	def __init__(self, cellsize: Union[float, int], origin: Optional[Pt] = None) -> None:
+		if cellsize is None or cellsize <= 0:
+			raise InvalidCellSize(cellsize)
+		self.cellsize = cellsize
+		if origin is None:
+			self.origin = Pt(0,0)
+		else:
+			self.origin = origin
+		self.cells: Dict[Tuple[int, int], set] = {}
+		self.positions: Dict[Union[str,int], Pt] = {}
+		# occupied cell range, only ever grows (a valid bound for ring searches)
+		self._cellbounds = None
+
+	def __repr__(self) -> str:
+		return f"grid index cellsize:{self.cellsize} cells:{len(self.cells)} items:{len(self.positions)}"
+
+	def __len__(self) -> int:
+		return len(self.positions)
+
+	def __contains__(self, p_ident: Union[str,int]) -> bool:
+		return p_ident in self.positions
+
+	@classmethod
+	def fromLayout(cls, p_layout: BaseLayout, p_values: Dict[Union[str,int], Pt],
+			cellsize: Optional[Union[float, int]] = None,
+			fromquantile: Optional[bool] = False,
+			doraise: Optional[bool] = False) -> "GridSpatialIndex":
+		"""Project p_values (ident -> value space point) through p_layout and index the results.
+		If cellsize is not given, it is taken from the active quantized axes or,
+		failing that, from the layout dimensions."""
+
+		if cellsize is None:
+			xa = p_layout.getXAxis(p_layout.activeXAxis) if not p_layout.activeXAxis is None else None
+			ya = p_layout.getYAxis(p_layout.activeYAxis) if not p_layout.activeYAxis is None else None
+			spans = [a.getQuantileSpan() for a in (xa, ya) if isinstance(a, QuantizedAxis)]
+			if len(spans) > 0:
+				cellsize = min(spans)
+			else:
+				cellsize = max(p_layout.width, p_layout.height) / max(1.0, sqrt(len(p_values)))
+
+		ret = cls(cellsize, origin=p_layout.origin)
+		for ident, val in p_values.items():
+			pos = p_layout.getPosition(val, fromquantile=fromquantile, doraise=doraise)
+			if pos is None or pos.x is None or pos.y is None:
+				continue
+			ret.insert(ident, pos)
+
+		return ret
+
+	def _cellOf(self, p_x: Union[float, int], p_y: Union[float, int]) -> Tuple[int, int]:
+		return (floor((p_x - self.origin.x) / self.cellsize), floor((p_y - self.origin.y) / self.cellsize))
+
+	def insert(self, p_ident: Union[str,int], p_pt: Pt) -> None:
+		if p_ident in self.positions:
+			self.remove(p_ident)
+		self.positions[p_ident] = p_pt
+		key = self._cellOf(*p_pt)
+		self.cells.setdefault(key, set()).add(p_ident)
+		if self._cellbounds is None:
+			self._cellbounds = (key[0], key[1], key[0], key[1])
+		else:
+			bminx, bminy, bmaxx, bmaxy = self._cellbounds
+			self._cellbounds = (min(bminx, key[0]), min(bminy, key[1]), max(bmaxx, key[0]), max(bmaxy, key[1]))
+
+	def remove(self, p_ident: Union[str,int]) -> bool:
+		if not p_ident in self.positions:
+			return False
+		pt = self.positions.pop(p_ident)
+		key = self._cellOf(*pt)
+		bucket = self.cells[key]
+		bucket.discard(p_ident)
+		if len(bucket) < 1:
+			del self.cells[key]
+		return True
+
+	def move(self, p_ident: Union[str,int], p_pt: Pt) -> None:
+		"Update the position of an ident, only touching buckets if the cell changes"
+		oldpt = self.positions.get(p_ident)
+		if not oldpt is None and self._cellOf(*oldpt) == self._cellOf(*p_pt):
+			self.positions[p_ident] = p_pt
+		else:
+			self.insert(p_ident, p_pt)
+
+	def getPosition(self, p_ident: Union[str,int]) -> Union[None, Pt]:
+		return self.positions.get(p_ident)
+
+	def _cellsInRect(self, p_rect: Rect) -> Iterable[Tuple[int, int]]:
+		cminx, cminy = self._cellOf(p_rect.minx, p_rect.miny)
+		cmaxx, cmaxy = self._cellOf(p_rect.maxx, p_rect.maxy)
+		# walk whichever is smaller: the covered cell range or the occupied cells
+		if (cmaxx - cminx + 1) * (cmaxy - cminy + 1) > len(self.cells):
+			for key in self.cells.keys():
+				if cminx <= key[0] <= cmaxx and cminy <= key[1] <= cmaxy:
+					yield key
+		else:
+			for cx in range(cminx, cmaxx+1):
+				for cy in range(cminy, cmaxy+1):
+					if (cx, cy) in self.cells:
+						yield (cx, cy)
+
+	def rectQuery(self, p_rect: Rect) -> List[Union[str,int]]:
+		"Idents whose position falls inside p_rect, borders included"
+		ret = []
+		for key in self._cellsInRect(p_rect):
+			for ident in self.cells[key]:
+				pt = self.positions[ident]
+				if p_rect.minx <= pt.x <= p_rect.maxx and p_rect.miny <= pt.y <= p_rect.maxy:
+					ret.append(ident)
+		return ret
+
+	def pointQuery(self, p_pt: Pt, tolerance: Optional[Union[float, int]] = 0) -> List[Union[str,int]]:
+		"Idents within tolerance distance of p_pt (hit-testing), nearest first"
+		rect = Rect(p_pt.x - tolerance, p_pt.y - tolerance, p_pt.x + tolerance, p_pt.y + tolerance)
+		tol2 = tolerance * tolerance
+		found = []
+		for ident in self.rectQuery(rect):
+			pt = self.positions[ident]
+			d2 = (pt.x - p_pt.x) ** 2 + (pt.y - p_pt.y) ** 2
+			if d2 <= tol2:
+				found.append((d2, ident))
+		found.sort(key=lambda item: item[0])
+		return [ident for _d2, ident in found]
+
+	def nearest(self, p_pt: Pt, k: Optional[int] = 1) -> List[Tuple[float, Union[str,int]]]:
+		"k nearest idents to p_pt as (distance, ident) tuples, nearest first"
+
+		if k < 1 or len(self.positions) < 1:
+			return []
+
+		cx, cy = self._cellOf(*p_pt)
+
+		# max-heap (negated distances) holding the best k candidates so far
+		best = []
+		seq = 0
+		bminx, bminy, bmaxx, bmaxy = self._cellbounds
+		# rings closer than the occupied bounds are empty, start at the first one touching them
+		ring = max(0, bminx - cx, cx - bmaxx, bminy - cy, cy - bmaxy)
+		maxring = max(abs(cx - bminx), abs(cx - bmaxx), abs(cy - bminy), abs(cy - bmaxy))
+		while True:
+			if ring == 0:
+				keys = [(cx, cy)]
+			else:
+				# ring sides, clipped to the occupied bounds
+				xs = range(max(cx - ring, bminx), min(cx + ring, bmaxx) + 1)
+				ys = range(max(cy - ring + 1, bminy), min(cy + ring - 1, bmaxy) + 1)
+				keys = []
+				if bminy <= cy - ring <= bmaxy:
+					keys.extend((x, cy - ring) for x in xs)
+				if bminy <= cy + ring <= bmaxy:
+					keys.extend((x, cy + ring) for x in xs)
+				if bminx <= cx - ring <= bmaxx:
+					keys.extend((cx - ring, y) for y in ys)
+				if bminx <= cx + ring <= bmaxx:
+					keys.extend((cx + ring, y) for y in ys)
+			for key in keys:
+				bucket = self.cells.get(key)
+				if bucket is None:
+					continue
+				for ident in bucket:
+					pt = self.positions[ident]
+					d = sqrt((pt.x - p_pt.x) ** 2 + (pt.y - p_pt.y) ** 2)
+					seq += 1
+					if len(best) < k:
+						heapq.heappush(best, (-d, seq, ident))
+					elif d < -best[0][0]:
+						heapq.heapreplace(best, (-d, seq, ident))
+
+			# every point outside the rings searched so far is at least this far away
+			if len(best) >= k and -best[0][0] <= ring * self.cellsize:
+				break
+			if ring >= maxring:
+				break
+			ring += 1
+
+		return [(-negd, ident) for negd, _seq, ident in sorted(best, reverse=True)]
@@ -0,0 +1,325 @@
+
+import os
+import pickle
+import hashlib
+
+from math import floor
+from collections import namedtuple
+from typing import Optional, List, Dict, Union, Tuple, Iterable
+
+from graphinet.graphinet import DirectedAciclicGraph, stableDigest, HASH_MASK
+from graphinet.diagramming import BaseLayout, Pt, Rect
+from graphinet.spatialindex import GridSpatialIndex
+from graphinet.layoutcache import layoutSignature
+
+Tile = namedtuple("Tile", "zoom tx ty rect nodes edges aggregates")
+Aggregate = namedtuple("Aggregate", "center count")
+
+class InvalidZoomLevel(RuntimeError):
+	def __init__(self, p_zoom, p_maxzoom):
+		self.zoom = p_zoom
+		self.maxzoom = p_maxzoom
+	def __str__(self):
+		return f"Invalid zoom level: {self.zoom} not in [0, {self.maxzoom}]"
+
+def segmentIntersectsRect(p_from: Pt, p_to: Pt, p_rect: Rect) -> bool:
+	"Liang-Barsky clipping test, borders included"
+	t0, t1 = 0.0, 1.0
+	dx = p_to.x - p_from.x
+	dy = p_to.y - p_from.y
+	for p, q in ((-dx, p_from.x - p_rect.minx), (dx, p_rect.maxx - p_from.x),
+			(-dy, p_from.y - p_rect.miny), (dy, p_rect.maxy - p_from.y)):
+		if p == 0:
+			if q < 0:
+				return False
+		else:
+			t = q / p
+			if p < 0:
+				if t > t1:
+					return False
+				t0 = max(t0, t)
+			else:
+				if t < t0:
+					return False
+				t1 = min(t1, t)
+	return True
+
+def segmentCells(p_from: Pt, p_to: Pt, p_cellsize: Union[float, int], p_origin: Pt,
+		pad: Optional[float] = 0) -> Iterable[Tuple[int, int]]:
+	"""Grid cells crossed by a segment, one column at a time. With pad > 0,
+	cells whose border the segment only touches are included too."""
+	if p_from.x > p_to.x:
+		p_from, p_to = p_to, p_from
+	cx0 = floor((p_from.x - pad - p_origin.x) / p_cellsize)
+	cx1 = floor((p_to.x + pad - p_origin.x) / p_cellsize)
+	dx = p_to.x - p_from.x
+	for cx in range(cx0, cx1+1):
+		if dx == 0:
+			ya, yb = p_from.y, p_to.y
+		else:
+			xa = min(p_to.x, max(p_from.x, p_origin.x + cx * p_cellsize))
+			xb = max(p_from.x, min(p_to.x, p_origin.x + (cx + 1) * p_cellsize))
+			ya = p_from.y + (xa - p_from.x) * (p_to.y - p_from.y) / dx
+			yb = p_from.y + (xb - p_from.x) * (p_to.y - p_from.y) / dx
+		cy0 = floor((min(ya, yb) - pad - p_origin.y) / p_cellsize)
+		cy1 = floor((max(ya, yb) + pad - p_origin.y) / p_cellsize)
+		for cy in range(cy0, cy1+1):
+			yield (cx, cy)
+
+class TiledDiagram(object):
+	"""Splits a laid-out diagram into zoom level tiles.
+
+	Zoom level 0 is a single tile covering the whole layout, each further
+	level halves the tile span. Tiles hold only the nodes and edges that
+	intersect them; when a tile has more than aggregate_threshold nodes,
+	they are collapsed into Aggregate glyphs over an aggregate_bins grid.
+	Generated tiles are cached in memory and, if cachedir is given, on disk
+	under a directory keyed by the graph structural hash, the layout
+	signature, node positions and edges as of construction (or the last
+	setVersion). Later moveNode and addEdge calls do not change that key,
+	they only re-stamp the tiles they touch, so every other tile on disk
+	stays reachable."""
+
+	def __init__(self, p_layout: BaseLayout, p_index: GridSpatialIndex,
+			edges: Optional[List[Tuple[Union[str,int], Union[str,int]]]] = None,
+			maxzoom: Optional[int] = 8,
+			aggregate_threshold: Optional[int] = 256,
+			aggregate_bins: Optional[int] = 8,
+			cachedir: Optional[str] = None,
+			version: Optional[int] = 0,
+			structhash: Optional[str] = None) -> None:
+		self.layout = p_layout
+		self.index = p_index
+		self.maxzoom = maxzoom
+		self.aggregate_threshold = aggregate_threshold
+		self.aggregate_bins = aggregate_bins
+		self.cachedir = cachedir
+		self.version = version
+		self.structhash = structhash
+		self.edges: List[Tuple[Union[str,int], Union[str,int]]] = []
+		self._edgecells: Dict[Tuple[int, int], List[int]] = {}
+		# edge indexes by endpoint ident, to re-bucket edges of moved nodes
+		self._incident: Dict[Union[str,int], List[int]] = {}
+		self._tiles: Dict[Tuple[int, int, int], Tile] = {}
+		# per tile sums of the digests of the changes that touched it, part of its disk file name
+		self._stamps: Dict[Tuple[int, int, int], int] = {}
+		# order independent digest sums of positions and edges, kept up to date by moveNode and addEdge
+		self._poshash = 0
+		for ident, pt in self.index.positions.items():
+			self._poshash = (self._poshash + stableDigest("p", ident, tuple(pt))) & HASH_MASK
+		self._edgehash = 0
+		if not edges is None:
+			for fromid, toid in edges:
+				self._indexEdge(fromid, toid)
+		self._cachekey = self._contentKey()
+
+	def __repr__(self) -> str:
+		return f"tiled diagram maxzoom:{self.maxzoom} version:{self.version} {self.layout}"
+
+	@classmethod
+	def fromGraph(cls, p_dag: DirectedAciclicGraph, p_layout: BaseLayout, p_values: Dict[Union[str,int], Pt],
+			fromquantile: Optional[bool] = False, **kwargs) -> "TiledDiagram":
+		"Index p_values projected through p_layout and take edges and version from p_dag"
+		idx = GridSpatialIndex.fromLayout(p_layout, p_values, fromquantile=fromquantile)
+		edges = [(ident, cid) for ident, n in p_dag.nodes.items() for cid in n.getChildrenIds()]
+		return cls(p_layout, idx, edges=edges, version=p_dag.version, structhash=p_dag.structuralHash(), **kwargs)
+
+	def _edgeCells(self, p_from: Pt, p_to: Pt) -> Iterable[Tuple[int, int]]:
+		return segmentCells(p_from, p_to, self.index.cellsize, self.index.origin)
+
+	def _indexEdge(self, p_fromid: Union[str,int], p_toid: Union[str,int]) -> Union[None, int]:
+		fpt = self.index.getPosition(p_fromid)
+		tpt = self.index.getPosition(p_toid)
+		if fpt is None or tpt is None:
+			return None
+		eidx = len(self.edges)
+		self.edges.append((p_fromid, p_toid))
+		self._incident.setdefault(p_fromid, []).append(eidx)
+		self._incident.setdefault(p_toid, []).append(eidx)
+		for key in self._edgeCells(fpt, tpt):
+			self._edgecells.setdefault(key, []).append(eidx)
+		self._edgehash = (self._edgehash + stableDigest("e", p_fromid, p_toid)) & HASH_MASK
+		return eidx
+
+	def _touchTiles(self, p_segments: List[Tuple[Pt, Pt]], p_digest: int) -> None:
+		"Drop the cached tiles any of the segments touches, at every zoom level, and re-stamp them"
+		for zoom in range(self.maxzoom+1):
+			span = self.getTileSpan(zoom)
+			keys = set()
+			for fpt, tpt in p_segments:
+				keys.update(segmentCells(fpt, tpt, span, self.layout.origin, pad=span*1e-9))
+			for tx, ty in keys:
+				key = (zoom, tx, ty)
+				self._tiles.pop(key, None)
+				self._stamps[key] = (self._stamps.get(key, 0) + p_digest) & HASH_MASK
+
+	def _incidentSegments(self, p_ident: Union[str,int]) -> List[Tuple[Pt, Pt]]:
+		ret = []
+		for eidx in self._incident.get(p_ident, []):
+			fromid, toid = self.edges[eidx]
+			ret.append((self.index.getPosition(fromid), self.index.getPosition(toid)))
+		return ret
+
+	def addEdge(self, p_fromid: Union[str,int], p_toid: Union[str,int]) -> None:
+		"Index a new edge, dropping only the cached tiles it crosses"
+		eidx = self._indexEdge(p_fromid, p_toid)
+		if eidx is None:
+			return
+		seg = (self.index.getPosition(p_fromid), self.index.getPosition(p_toid))
+		self._touchTiles([seg], stableDigest("e", p_fromid, p_toid, tuple(seg[0]), tuple(seg[1])))
+
+	def moveNode(self, p_ident: Union[str,int], p_pt: Pt) -> None:
+		"""Move a node in the spatial index, re-bucketing its edges and dropping
+		only the cached tiles touched by the node or its edges, before or after"""
+
+		oldpt = self.index.getPosition(p_ident)
+		segments = [(p_pt, p_pt)]
+		if not oldpt is None:
+			segments.append((oldpt, oldpt))
+			self._poshash = (self._poshash - stableDigest("p", p_ident, tuple(oldpt))) & HASH_MASK
+		self._poshash = (self._poshash + stableDigest("p", p_ident, tuple(p_pt))) & HASH_MASK
+
+		eidxs = self._incident.get(p_ident, [])
+		before = self._incidentSegments(p_ident)
+		for eidx, (fpt, tpt) in zip(eidxs, before):
+			for key in set(self._edgeCells(fpt, tpt)):
+				bucket = self._edgecells[key]
+				bucket.remove(eidx)
+				if len(bucket) < 1:
+					del self._edgecells[key]
+
+		self.index.move(p_ident, p_pt)
+
+		after = self._incidentSegments(p_ident)
+		for eidx, (fpt, tpt) in zip(eidxs, after):
+			for key in set(self._edgeCells(fpt, tpt)):
+				self._edgecells.setdefault(key, []).append(eidx)
+
+		# the stamp covers the moved node and the segments of its edges, before and after
+		digest = stableDigest("m", p_ident, None if oldpt is None else tuple(oldpt), tuple(p_pt),
+			[(tuple(fpt), tuple(tpt)) for fpt, tpt in before + after])
+		self._touchTiles(segments + before + after, digest)
+
+	def setVersion(self, p_version: int, structhash: Optional[str] = None) -> None:
+		"Tiles generated for other graph versions are no longer served"
+		if p_version != self.version or structhash != self.structhash:
+			self.version = p_version
+			self.structhash = structhash
+			self._tiles.clear()
+			self._stamps.clear()
+			self._cachekey = self._contentKey()
+
+	def getTileSpan(self, p_zoom: int) -> float:
+		if p_zoom < 0 or p_zoom > self.maxzoom:
+			raise InvalidZoomLevel(p_zoom, self.maxzoom)
+		return max(self.layout.width, self.layout.height) / (2 ** p_zoom)
+
+	def getTileRect(self, p_zoom: int, p_tx: int, p_ty: int) -> Rect:
+		span = self.getTileSpan(p_zoom)
+		minx = self.layout.origin.x + p_tx * span
+		miny = self.layout.origin.y + p_ty * span
+		return Rect(minx, miny, minx + span, miny + span)
+
+	def tilesForViewport(self, p_zoom: int, p_viewport: Rect) -> List[Tuple[int, int]]:
+		"Tile coordinates at p_zoom intersecting p_viewport, clamped to the layout"
+		span = self.getTileSpan(p_zoom)
+		ntiles = 2 ** p_zoom
+		org = self.layout.origin
+		tx0 = max(0, floor((p_viewport.minx - org.x) / span))
+		ty0 = max(0, floor((p_viewport.miny - org.y) / span))
+		tx1 = min(ntiles - 1, floor((p_viewport.maxx - org.x) / span))
+		ty1 = min(ntiles - 1, floor((p_viewport.maxy - org.y) / span))
+		return [(tx, ty) for ty in range(ty0, ty1+1) for tx in range(tx0, tx1+1)]
+
+	def getViewport(self, p_zoom: int, p_viewport: Rect) -> List[Tile]:
+		return [self.getTile(p_zoom, tx, ty) for tx, ty in self.tilesForViewport(p_zoom, p_viewport)]
+
+	def _contentKey(self) -> str:
+		sig = repr((self.structhash, layoutSignature(self.layout), self.index.cellsize,
+			self.maxzoom, self.aggregate_threshold, self.aggregate_bins, self._poshash, self._edgehash))
+		return hashlib.blake2b(sig.encode("utf-8"), digest_size=16).hexdigest()
+
+	def cacheKey(self) -> str:
+		"""Disk cache directory name: graph structural hash, layout signature,
+		tiling parameters, node positions and edges as of construction or the
+		last setVersion. Positions and edges are summed as per item digests,
+		so their order does not matter."""
+		return self._cachekey
+
+	def _tilePath(self, p_zoom: int, p_tx: int, p_ty: int) -> str:
+		stamp = self._stamps.get((p_zoom, p_tx, p_ty), 0)
+		if stamp == 0:
+			fname = f"{p_tx}_{p_ty}.pickle"
+		else:
+			fname = f"{p_tx}_{p_ty}_{stamp:016x}.pickle"
+		return os.path.join(self.cachedir, self._cachekey, str(p_zoom), fname)
+
+	def getTile(self, p_zoom: int, p_tx: int, p_ty: int) -> Tile:
+
+		key = (p_zoom, p_tx, p_ty)
+		ret = self._tiles.get(key)
+		if not ret is None:
+			return ret
+
+		if not self.cachedir is None:
+			path = self._tilePath(*key)
+			if os.path.exists(path):
+				with open(path, 'rb') as fl:
+					ret = pickle.load(fl)
+				self._tiles[key] = ret
+				return ret
+
+		ret = self._buildTile(*key)
+		self._tiles[key] = ret
+
+		if not self.cachedir is None:
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+			with open(path, 'wb') as fl:
+				pickle.dump(ret, fl)
+
+		return ret
+
+	def _buildTile(self, p_zoom: int, p_tx: int, p_ty: int) -> Tile:
+
+		rect = self.getTileRect(p_zoom, p_tx, p_ty)
+		nodes = self.index.rectQuery(rect)
+
+		if len(nodes) > self.aggregate_threshold:
+			binspan = (rect.maxx - rect.minx) / self.aggregate_bins
+			bins = {}
+			for ident in nodes:
+				pt = self.index.getPosition(ident)
+				bkey = (min(self.aggregate_bins - 1, floor((pt.x - rect.minx) / binspan)),
+						min(self.aggregate_bins - 1, floor((pt.y - rect.miny) / binspan)))
+				acc = bins.setdefault(bkey, [0, 0, 0])
+				acc[0] += pt.x
+				acc[1] += pt.y
+				acc[2] += 1
+			aggregates = [Aggregate(Pt(sx / cnt, sy / cnt), cnt) for sx, sy, cnt in bins.values()]
+			return Tile(p_zoom, p_tx, p_ty, rect, [], [], aggregates)
+
+		eidxs = set()
+		for ckey in self._edgeCellsInRect(rect):
+			eidxs.update(self._edgecells[ckey])
+		edges = []
+		for eidx in sorted(eidxs):
+			fromid, toid = self.edges[eidx]
+			if segmentIntersectsRect(self.index.getPosition(fromid), self.index.getPosition(toid), rect):
+				edges.append(self.edges[eidx])
+
+		return Tile(p_zoom, p_tx, p_ty, rect, nodes, edges, [])
+
+	def _edgeCellsInRect(self, p_rect: Rect) -> Iterable[Tuple[int, int]]:
+		cs = self.index.cellsize
+		org = self.index.origin
+		cminx, cminy = floor((p_rect.minx - org.x) / cs), floor((p_rect.miny - org.y) / cs)
+		cmaxx, cmaxy = floor((p_rect.maxx - org.x) / cs), floor((p_rect.maxy - org.y) / cs)
+		if (cmaxx - cminx + 1) * (cmaxy - cminy + 1) > len(self._edgecells):
+			for key in self._edgecells.keys():
+				if cminx <= key[0] <= cmaxx and cminy <= key[1] <= cmaxy:
+					yield key
+		else:
+			for cx in range(cminx, cmaxx+1):
+				for cy in range(cminy, cmaxy+1):
+					if (cx, cy) in self._edgecells:
+						yield (cx, cy)
@@ -0,0 +1,24 @@
+
+import pytest
+
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode
+
+def preparedDag():
+	"Small diamond shaped graph shared by most tests, zeroot -> zefilhoa/zefilhob -> zenetob -> zbisenetob/zbisenetoc"
+	m = DirectedAciclicGraph()
+	m.addNode(BaseGraphNode(ident="zeroot"))
+	m.addNode(BaseGraphNode(ident="zefilhoa", parentids=["zeroot"]))
+	m.addNode(BaseGraphNode(ident="zefilhob", parentids=["zeroot"]))
+	m.addNode(BaseGraphNode(ident="zenetob", parentids=["zefilhoa", "zefilhob"]))
+	m.addNode(BaseGraphNode(ident="zbisenetob", parentids=["zenetob"]))
+	m.addNode(BaseGraphNode(ident="zbisenetoc", parentids=["zenetob"]))
+	return m
+
+@pytest.fixture()
+def prepared_dag():
+	yield preparedDag()
+
+@pytest.fixture()
+def dag_builder():
+	"For tests needing several independent copies of the prepared graph"
+	yield preparedDag
@@ -0,0 +1,130 @@
+
+import asyncio
+import pytest
+
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode, CycleAttemptError, MissingNodeIDsError
+from graphinet.asyncdag import AsyncDAG, FacadeNotRunningError
+
+def chain(p_n):
+	m = DirectedAciclicGraph()
+	m.addNode(BaseGraphNode(ident=0))
+	for i in range(1, p_n):
+		m.addNode(BaseGraphNode(ident=i, parentids=[i-1]))
+	return m
+
+class TestClass:
+
+	def test_reads(self, prepared_dag):
+		async def run():
+			async with AsyncDAG(prepared_dag, chunksize=2) as adag:
+				down = [nd.ident async for nd in adag.iterateDown("zeroot")]
+				up = [nd.ident async for nd in adag.iterateUp("zbisenetob")]
+				roots = await adag.query(lambda dag: dag.rootids)
+			return down, up, roots
+		down, up, roots = asyncio.run(run())
+		assert down == list(nd.ident for nd in prepared_dag.iterateDown("zeroot"))
+		assert up == list(nd.ident for nd in prepared_dag.iterateUp("zbisenetob"))
+		assert roots == ["zeroot"]
+
+	def test_offload(self):
+		async def run():
+			async with AsyncDAG(chain(500), offloadthreshold=100) as adag:
+				return [nd.ident async for nd in adag.iterateDown(0)]
+		assert asyncio.run(run()) == list(range(500))
+
+	def test_interleaving(self):
+		# a long read hands control back, other coroutines keep running
+		ticks = []
+		async def ticker():
+			for i in range(5):
+				ticks.append(i)
+				await asyncio.sleep(0)
+		async def run():
+			async with AsyncDAG(chain(2000), chunksize=100) as adag:
+				t = asyncio.ensure_future(ticker())
+				cnt = 0
+				async for _nd in adag.iterateDown(0):
+					cnt += 1
+					if cnt == 1000:
+						seen = len(ticks)
+				await t
+			return seen
+		assert asyncio.run(run()) > 0
+
+	def test_coalescing(self):
+		m = DirectedAciclicGraph()
+		for i in range(50):
+			m.addNode(BaseGraphNode(ident=i))
+		async def run():
+			async with AsyncDAG(m) as adag:
+				return await adag.addEdges([(i, i+1) for i in range(49)])
+		version = m.version
+		res = asyncio.run(run())
+		assert all(not nd is None for nd in res)
+		# a single batch, validated and applied at once
+		assert m.version == version + 1
+		assert m.rootids == [0]
+		assert len(list(m.iterateDown(0))) == 50
+
+	def test_cycle_batch(self):
+		# a batch closing a cycle is narrowed down, with the same outcome as one by one
+		m = DirectedAciclicGraph()
+		for i in range(200):
+			m.addNode(BaseGraphNode(ident=i))
+		edges = [(i, i+1) for i in reversed(range(199))] + [(199, 0), (5, 150), (150, 5)]
+		async def run():
+			async with AsyncDAG(m) as adag:
+				return await adag.addEdges(edges)
+		res = asyncio.run(run())
+		assert [edges[idx] for idx, nd in enumerate(res) if nd is None] == [(199, 0), (150, 5)]
+		assert m.rootids == [0]
+		assert len(list(m.iterateDown(0))) == 200
+
+	def test_add_edges(self):
+		m = chain(5)
+		o = chain(5)
+		edges = [(1, 3), (4, 2), (0, 4), (3, 1), (2, 0)]
+		rejected = [edge for edge in edges if m.addEdge(*edge) is None]
+		assert o.addEdges(edges) == rejected == [(4, 2), (3, 1), (2, 0)]
+		assert o.structuralHash() == m.structuralHash()
+
+	def test_batch_errors(self, prepared_dag):
+		async def run():
+			async with AsyncDAG(prepared_dag) as adag:
+				return await asyncio.gather(
+					adag.addEdge("zeroot", "zbisenetoc"),
+					adag.addEdge("zbisenetob", "zefilhoa", doraise=True),
+					adag.addEdge("zeroot", "xafs"),
+					adag.addEdge("zbisenetoc", "zeroot"),
+					adag.addEdge("zefilhoa", "zbisenetob"),
+					return_exceptions=True)
+		res = asyncio.run(run())
+		assert res[0].ident == "zeroot"
+		assert isinstance(res[1], CycleAttemptError)
+		assert isinstance(res[2], MissingNodeIDsError)
+		assert res[3] is None
+		assert res[4].ident == "zefilhoa"
+		assert "zbisenetoc" in prepared_dag.getNode("zeroot").getChildrenIds()
+		assert "zbisenetob" in prepared_dag.getNode("zefilhoa").getChildrenIds()
+		assert prepared_dag.rootids == ["zeroot"]
+
+	def test_writes_wait_reads(self, prepared_dag):
+		async def run():
+			async with AsyncDAG(prepared_dag, chunksize=1) as adag:
+				got = []
+				async for nd in adag.iterateDown("zeroot"):
+					if len(got) == 0:
+						w = asyncio.ensure_future(adag.addNode(BaseGraphNode(ident="novo", parentids=["zeroot"])))
+						await asyncio.sleep(0)
+					got.append(nd.ident)
+				await w
+				after = [nd.ident async for nd in adag.iterateDown("zeroot")]
+			return got, after
+		got, after = asyncio.run(run())
+		assert not "novo" in got
+		assert "novo" in after
+
+	def test_not_running(self, prepared_dag):
+		adag = AsyncDAG(prepared_dag)
+		with pytest.raises(FacadeNotRunningError):
+			asyncio.run(adag.addEdge("zeroot", "zbisenetoc"))
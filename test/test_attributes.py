@@ -0,0 +1,77 @@
+
+import pytest
+
+from graphinet.graphinet import BaseGraphNode, MissingNodeIDsError
+from graphinet.attributes import AttributeStore, CATEGORY, UnknownAttributeError, \
+	InvalidOperatorError, ExistingAttributeError
+
+@pytest.fixture()
+def prepared_store(prepared_dag):
+	st = AttributeStore(prepared_dag)
+	st.addColumn("cost", typecode="d")
+	st.addColumn("owner", typecode=CATEGORY, default="nobody")
+	st.setValues("cost", {"zeroot": 10, "zefilhoa": 150, "zefilhob": 50, "zenetob": 200, "zbisenetob": 120, "zbisenetoc": 5})
+	st.setValues("owner", {"zefilhoa": "ana", "zenetob": "rui", "zbisenetob": "rui"})
+	yield st
+
+class TestClass:
+
+	def test_values(self, prepared_store):
+		assert prepared_store.getValue("zenetob", "cost") == 200
+		assert prepared_store.getValue("zenetob", "owner") == "rui"
+		assert prepared_store.getValue("zeroot", "owner") == "nobody"
+		with pytest.raises(UnknownAttributeError):
+			prepared_store.getValue("zeroot", "xpto")
+		with pytest.raises(MissingNodeIDsError):
+			prepared_store.setValue("xafs", "cost", 1)
+		with pytest.raises(ExistingAttributeError):
+			prepared_store.addColumn("cost")
+
+	def test_select(self, prepared_store):
+		assert set(prepared_store.select("cost", ">", 100)) == set(["zefilhoa", "zenetob", "zbisenetob"])
+		assert set(prepared_store.select("owner", "==", "rui")) == set(["zenetob", "zbisenetob"])
+		assert prepared_store.select("owner", "==", "zé") == []
+		with pytest.raises(InvalidOperatorError):
+			prepared_store.select("owner", ">", "rui")
+		with pytest.raises(InvalidOperatorError):
+			prepared_store.select("cost", "~", 1)
+
+	def test_traversal(self, prepared_store):
+		assert set(prepared_store.descendantsWhere("zeroot", "cost", ">", 100)) == set(["zefilhoa", "zenetob", "zbisenetob"])
+		assert set(prepared_store.descendantsWhere("zeroot", "cost", ">", 100, prune=True)) == set(["zefilhoa", "zenetob", "zbisenetob"])
+		assert prepared_store.descendantsWhere("zefilhob", "cost", "<", 100) == ["zbisenetoc"]
+		assert prepared_store.descendantsWhere("zefilhob", "cost", "<", 100, prune=True) == []
+		assert set(prepared_store.ancestorsWhere("zbisenetoc", "cost", ">=", 50)) == set(["zenetob", "zefilhoa", "zefilhob"])
+
+	def test_aggregates(self, prepared_store):
+		assert prepared_store.aggregateDown("zeroot", "cost", "sum") == 525
+		assert prepared_store.aggregateDown("zenetob", "cost", "max") == 120
+		assert prepared_store.aggregateDown("zenetob", "cost", "count", includestart=True) == 3
+		assert prepared_store.aggregateUp("zbisenetoc", "cost", "min") == 10
+		assert prepared_store.aggregate("cost", "mean", among=["zeroot", "zenetob"]) == 105
+		assert prepared_store.aggregateDown("zbisenetoc", "cost", "max") is None
+		with pytest.raises(InvalidOperatorError):
+			prepared_store.aggregate("cost", "median")
+
+	def test_category_aggregates(self, prepared_store):
+		prepared_store.setValue("zeroot", "owner", "zzz")
+		# insertion order of codes is nobody, ana, rui, zzz: min and max compare the values
+		assert prepared_store.aggregate("owner", "min") == "ana"
+		assert prepared_store.aggregate("owner", "max") == "zzz"
+		assert prepared_store.aggregateDown("zenetob", "owner", "min") == "nobody"
+		assert prepared_store.aggregate("owner", "count") == 6
+		for func in ("sum", "mean"):
+			with pytest.raises(InvalidOperatorError):
+				prepared_store.aggregate("owner", func)
+
+	def test_removed_nodes(self, prepared_store):
+		prepared_store.dag.removeNode("zenetob")
+		assert set(prepared_store.select("cost", ">", 100)) == set(["zefilhoa", "zbisenetob"])
+		assert prepared_store.select("owner", "!=", "nobody", among=["zefilhoa", "zbisenetob"]) == ["zefilhoa", "zbisenetob"]
+
+	def test_growth(self, prepared_store):
+		prepared_store.dag.addNode(BaseGraphNode(ident="novo", parentids=["zbisenetoc"]))
+		assert prepared_store.getValue("novo", "cost") == 0
+		assert prepared_store.getValue("novo", "owner") == "nobody"
+		prepared_store.setValue("novo", "cost", 1000)
+		assert prepared_store.aggregateDown("zefilhob", "cost", "max") == 1000
@@ -1,18 +1,9 @@
 
+import pickle
 import pytest
 
-from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode, CycleAttemptError, MissingNodeIDsError
-
-@pytest.fixture()
-def prepared_dag():
-	m = DirectedAciclicGraph()
-	m.addNode(BaseGraphNode(ident="zeroot"))
-	m.addNode(BaseGraphNode(ident="zefilhoa", parentids=["zeroot"]))
-	m.addNode(BaseGraphNode(ident="zefilhob", parentids=["zeroot"]))
-	m.addNode(BaseGraphNode(ident="zenetob", parentids=["zefilhoa", "zefilhob"]))
-	m.addNode(BaseGraphNode(ident="zbisenetob", parentids=["zenetob"]))
-	m.addNode(BaseGraphNode(ident="zbisenetoc", parentids=["zenetob"]))
-	yield m
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode, CycleAttemptError, MissingNodeIDsError, \
+	InvalidRootIdsError, NodeInGraphError
 
 class TestClass:
 
@@ -61,3 +52,98 @@ class TestClass:
 	def test_edge2(self, prepared_dag):
 		with pytest.raises(CycleAttemptError):
 			prepared_dag.addEdge("zenetob", "zeroot", doraise=True)
+
+	def test_structhash(self, prepared_dag):
+		other = DirectedAciclicGraph()
+		other.addNode(BaseGraphNode(ident="zbisenetoc"))
+		other.addNode(BaseGraphNode(ident="zbisenetob"))
+		other.addNode(BaseGraphNode(ident="zenetob"))
+		other.addNode(BaseGraphNode(ident="zefilhoa"))
+		other.addNode(BaseGraphNode(ident="zefilhob"))
+		other.addNode(BaseGraphNode(ident="zeroot"))
+		for f, t in (("zenetob", "zbisenetob"), ("zenetob", "zbisenetoc"), ("zeroot", "zefilhoa"),
+				("zeroot", "zefilhob"), ("zefilhoa", "zenetob"), ("zefilhob", "zenetob")):
+			other.addEdge(f, t)
+		assert other.structuralHash() == prepared_dag.structuralHash()
+		h = prepared_dag.structuralHash()
+		prepared_dag.addEdge("zefilhoa", "zenetob")
+		assert prepared_dag.structuralHash() == h
+		prepared_dag.addEdge("zeroot", "zenetob")
+		assert prepared_dag.structuralHash() != h
+
+	def test_interning(self, prepared_dag):
+		num = prepared_dag.getIdentNum("zenetob")
+		assert isinstance(num, int)
+		assert prepared_dag.getNumIdent(num) == "zenetob"
+		assert prepared_dag.getIdentNum("xafs") is None
+		with pytest.raises(MissingNodeIDsError):
+			prepared_dag.getIdentNum("xafs", doraise=True)
+
+	def test_numaccess(self, prepared_dag):
+		nums = {ident: prepared_dag.getIdentNum(ident) for ident in prepared_dag.nodes}
+		assert prepared_dag.rootNums() == [nums["zeroot"]]
+		assert prepared_dag.parentNums(nums["zenetob"]) == [nums["zefilhoa"], nums["zefilhob"]]
+		assert prepared_dag.childNums(nums["zenetob"]) == [nums["zbisenetob"], nums["zbisenetoc"]]
+		assert [prepared_dag.getNumIdent(num) for num in prepared_dag.topologicalNums()] == prepared_dag.topologicalOrder()
+		# removed nodes leave their slot behind
+		prepared_dag.removeNode("zefilhob")
+		assert prepared_dag.nodeSlots() == 6
+		assert sorted(prepared_dag.liveNums()) == sorted(num for ident, num in nums.items() if ident != "zefilhob")
+		assert not prepared_dag.isLiveNum(nums["zefilhob"])
+		assert prepared_dag.isLiveNum(nums["zeroot"])
+
+	def test_roots(self, prepared_dag):
+		prepared_dag.addNode(BaseGraphNode(ident="outro"))
+		assert prepared_dag.rootids == ['zeroot', 'outro']
+		prepared_dag.addEdge("zbisenetoc", "outro")
+		assert prepared_dag.rootids == ['zeroot']
+		# a copy, changing it does not change the graph
+		prepared_dag.rootids.append('zefilhoa')
+		assert prepared_dag.rootids == ['zeroot']
+		# only a reordering of the actual roots is accepted
+		prepared_dag.removeEdge("zbisenetoc", "outro")
+		prepared_dag.rootids = ['outro', 'zeroot']
+		assert prepared_dag.rootids == ['outro', 'zeroot']
+		for wrong in (['zeroot', 'outro', 'zefilhoa'], ['zeroot'], [], ['zeroot', 'zeroot']):
+			with pytest.raises(InvalidRootIdsError):
+				prepared_dag.rootids = wrong
+		assert prepared_dag.rootids == ['outro', 'zeroot']
+		assert prepared_dag.topologicalOrder()[:2] == ['outro', 'zeroot']
+		with pytest.raises(MissingNodeIDsError):
+			prepared_dag.rootids = ['xafs']
+
+	def test_node_mutators(self, prepared_dag):
+		nd = prepared_dag.getNode("zenetob")
+		with pytest.raises(NodeInGraphError):
+			nd.removeParentId("zefilhoa")
+		with pytest.raises(NodeInGraphError):
+			nd.assertOtherIsChild(BaseGraphNode(ident="novo"))
+		with pytest.raises(NodeInGraphError):
+			BaseGraphNode(ident="novo").assertOtherIsParent(nd)
+		# detached nodes keep their own lists
+		a, b = BaseGraphNode(ident="a"), BaseGraphNode(ident="b")
+		a.assertOtherIsChild(b)
+		assert b.getParentIds() == ["a"]
+		b.removeParentId("a")
+		assert b.getParentIds() == []
+
+	def test_idviews(self, prepared_dag):
+		# node id lists are views over the graph adjacency, edges are stored once
+		nd = prepared_dag.getNode("zenetob")
+		assert nd.getParentIds() == ["zefilhoa", "zefilhob"]
+		prepared_dag.removeEdge("zefilhob", "zenetob")
+		assert nd.getParentIds() == ["zefilhoa"]
+		assert prepared_dag.getNode("zefilhob").getChildrenIds() == []
+		assert pickle.loads(pickle.dumps(nd)).getParentIds() == ["zefilhoa"]
+		assert prepared_dag.removeNode("zenetob").getChildrenIds() == []
+
+	def test_nodecycle(self, prepared_dag):
+		n = BaseGraphNode(ident="novo", parentids=["zenetob"])
+		n.childrenids = ["zefilhoa", "zbisenetob"]
+		with pytest.raises(CycleAttemptError):
+			prepared_dag.addNode(n, doraise=True)
+		n = BaseGraphNode(ident="novo", parentids=["zefilhoa"])
+		n.childrenids = ["zeroot", "zbisenetob"]
+		prepared_dag.addNode(n)
+		assert prepared_dag.getNode("novo").getChildrenIds() == ["zbisenetob"]
+		assert prepared_dag.rootids == ['zeroot']
@@ -0,0 +1,91 @@
+
+import io
+import json
+import pytest
+
+from graphinet.cli import main, loadGraph, analyze, StageTimer, depthStats, degreeStats, componentStats
+
+EDGES = """# small test graph
+zeroot zefilhoa
+zeroot zefilhob
+zefilhoa zenetob
+zefilhob zenetob
+zenetob zbisenetob
+zenetob zbisenetoc
+zbisenetoc zeroot
+outro
+outro outro
+"""
+
+@pytest.fixture()
+def edgefile(tmp_path):
+	path = tmp_path / "edges.txt"
+	path.write_text(EDGES)
+	yield str(path)
+
+class TestClass:
+
+	def test_load(self):
+		for batchsize in (1, 3, 100):
+			dag, rejected = loadGraph(io.StringIO(EDGES), batchsize=batchsize)
+			assert len(dag.nodes) == 7
+			assert sorted(rejected) == [("outro", "outro"), ("zbisenetoc", "zeroot")]
+			assert sorted(dag.rootids) == ["outro", "zeroot"]
+
+	def test_stages(self):
+		parents = [[], [0], [0], [1, 2], [3], [3], []]
+		assert depthStats(parents)[1]["maxdepth"] == 3
+		degs = degreeStats(parents)[1]
+		assert degs["fanin"] == {0: 2, 1: 4, 2: 1}
+		assert degs["fanout"][2] == 2
+		comps = componentStats(parents)[1]
+		assert comps["components"] == 2
+		assert comps["largest"] == 6
+
+	@pytest.mark.parametrize("workers", [1, 2])
+	def test_analyze(self, workers):
+		dag, _rejected = loadGraph(io.StringIO(EDGES))
+		timer = StageTimer()
+		stats = analyze(dag, timer, workers=workers)
+		assert stats["depths"] == {0: 2, 1: 2, 2: 1, 3: 2}
+		assert stats["components"] == 2
+		assert [name for name, _t in timer.stages] == ["depths", "degrees", "components"]
+
+	def test_analyze_removed(self):
+		# slots of removed nodes are not counted as isolated nodes
+		dag, _rejected = loadGraph(io.StringIO(EDGES))
+		dag.removeNode("outro")
+		dag.removeNode("zefilhoa")
+		stats = analyze(dag, StageTimer(), workers=1)
+		assert stats["components"] == 1
+		assert stats["largest"] == 5
+		assert stats["depths"] == {0: 1, 1: 1, 2: 1, 3: 2}
+
+	def test_load_cycle(self):
+		# a reversed chain closed by a back edge, only the back edge is rejected
+		lines = [f"{i} {i+1}" for i in reversed(range(2000))] + ["2000 0"]
+		dag, rejected = loadGraph(io.StringIO("\n".join(lines)))
+		assert rejected == [("2000", "0")]
+		assert dag.rootids == ["0"]
+
+	def test_validate(self, edgefile, capsys):
+		assert main(["validate", edgefile, "--json"]) == 1
+		out, err = capsys.readouterr()
+		report = json.loads(out)
+		assert report["nodes"] == 7
+		assert report["roots"] == 2
+		assert report["cycleedges"] == 2
+		assert "stage load:" in err
+		assert main(["analyze", edgefile, "--workers", "1", "-q"]) == 0
+		out, err = capsys.readouterr()
+		assert "maxdepth: 3" in out
+		assert err == ""
+
+	def test_render(self, edgefile, tmp_path, capsys):
+		layout = str(tmp_path / "layout.tsv")
+		assert main(["render", edgefile, "--workers", "1", "--layout", layout]) == 0
+		with open(layout) as fl:
+			rows = [line.split("\t") for line in fl]
+		assert sorted(row[0] for row in rows) == ["outro", "zbisenetob", "zbisenetoc", "zefilhoa", "zefilhob", "zenetob", "zeroot"]
+		_out, err = capsys.readouterr()
+		assert "stage layout:" in err
@@ -0,0 +1,116 @@
+
+import pytest
+
+from graphinet.graphinet import BaseGraphNode, GraphDiff, \
+	CycleAttemptError, MissingNodeIDsError, SelfReferenceAttenpt
+from graphinet.attributes import AttributeStore
+
+def edgeSet(p_dag):
+	return {(pid, ident) for ident, n in p_dag.nodes.items() for pid in n.getParentIds()}
+
+@pytest.fixture()
+def prepared_pair(dag_builder):
+	yesterday = dag_builder()
+	today = dag_builder()
+	today.removeNode("zbisenetoc")
+	today.removeEdge("zefilhob", "zenetob")
+	today.addNode(BaseGraphNode(ident="outro"))
+	today.addEdge("outro", "zbisenetob")
+	yield yesterday, today
+
+class TestClass:
+
+	def test_remove(self, prepared_dag):
+		m = prepared_dag
+		h = m.structuralHash()
+		m.addNode(BaseGraphNode(ident="outro", parentids=["zbisenetoc"]))
+		m.removeNode("outro")
+		assert m.structuralHash() == h
+		assert not m.removeEdge("zeroot", "zenetob")
+		with pytest.raises(MissingNodeIDsError):
+			m.removeEdge("zeroot", "zenetob", doraise=True)
+		assert m.removeEdge("zeroot", "zefilhoa")
+		assert m.rootids == ["zeroot", "zefilhoa"]
+		assert m.getNode("zeroot").getChildrenIds() == ["zefilhob"]
+		assert m.getNode("zefilhoa").getParentIds() == []
+
+	def test_apply_invalid(self, prepared_dag):
+		# bad edges are refused before anything changes
+		m = prepared_dag
+		h = m.structuralHash()
+		before = edgeSet(m)
+		with pytest.raises(MissingNodeIDsError):
+			m.applyDiff(GraphDiff(["novo"], ["zefilhob"], [("novo", "ghost")], [], [], []))
+		with pytest.raises(MissingNodeIDsError):
+			m.applyDiff(GraphDiff([], ["zefilhob"], [("zefilhob", "zbisenetoc")], [], [], []))
+		with pytest.raises(SelfReferenceAttenpt):
+			m.applyDiff(GraphDiff(["novo"], [], [("novo", "novo")], [], [], []))
+		with pytest.raises(MissingNodeIDsError):
+			m.applyDiff(GraphDiff([], [], [], [("ghost", "zenetob")], [], []))
+		assert m.structuralHash() == h
+		assert edgeSet(m) == before
+		assert m.getNode("novo") is None
+		assert not m.getNode("zefilhob") is None
+
+	def test_rollback_numbers(self, prepared_dag):
+		m = prepared_dag
+		st = AttributeStore(m)
+		st.addColumn("cost")
+		st.setValue("zefilhob", "cost", 42)
+		num = m.getIdentNum("zefilhob")
+		d = GraphDiff(["novo"], ["zefilhob"], [("zbisenetob", "novo"), ("novo", "zefilhoa")], [], [], [])
+		assert m.applyDiff(d) is None
+		assert m.getIdentNum("zefilhob") == num
+		assert st.getValue("zefilhob", "cost") == 42
+		assert m.getNode("zeroot").getChildrenIds() == ["zefilhoa", "zefilhob"]
+
+	def test_nodiff(self, dag_builder):
+		d = dag_builder().diff(dag_builder())
+		assert d == GraphDiff([], [], [], [], [], [])
+
+	def test_version(self, prepared_dag):
+		# only diffs that change something bump the version
+		m = prepared_dag
+		version = m.version
+		assert m.applyDiff(GraphDiff([], [], [], [], [], [])) is not None
+		assert m.applyDiff(GraphDiff([], [], [("zeroot", "zefilhoa")], [("zeroot", "zenetob")], [], [])) is not None
+		assert m.version == version
+		m.applyDiff(GraphDiff([], [], [("zeroot", "zenetob")], [], [], []))
+		assert m.version == version + 1
+
+	def test_diff(self, prepared_pair):
+		yesterday, today = prepared_pair
+		d = yesterday.diff(today)
+		assert d.added_nodes == ["outro"]
+		assert d.removed_nodes == ["zbisenetoc"]
+		assert set(d.added_edges) == set([("outro", "zbisenetob")])
+		assert set(d.removed_edges) == set([("zefilhob", "zenetob"), ("zenetob", "zbisenetoc")])
+		assert d.added_roots == ["outro"]
+		assert d.removed_roots == []
+
+	def test_merge(self, prepared_pair):
+		yesterday, today = prepared_pair
+		assert not yesterday.merge(today) is None
+		assert yesterday.structuralHash() == today.structuralHash()
+		assert edgeSet(yesterday) == edgeSet(today)
+		assert set(yesterday.rootids) == set(today.rootids)
+		assert yesterday.getNode("outro") is not today.getNode("outro")
+		assert yesterday.diff(today) == GraphDiff([], [], [], [], [], [])
+
+	def test_merge_cycle(self, prepared_dag):
+		m = prepared_dag
+		h = m.structuralHash()
+		before = edgeSet(m)
+		d = GraphDiff(["novo"], ["zefilhob"], [("zbisenetob", "novo"), ("novo", "zefilhoa")], [], [], [])
+		with pytest.raises(CycleAttemptError):
+			m.applyDiff(d, doraise=True)
+		assert m.structuralHash() == h
+		assert edgeSet(m) == before
+		assert m.getNode("novo") is None
+		assert m.applyDiff(d) is None
+		assert m.rootids == ["zeroot"]
+		assert m.getNode("zenetob").getParentIds() == ["zefilhoa", "zefilhob"]
+		# reversing an edge in one go is fine
+		d = GraphDiff([], [], [("zenetob", "zefilhoa")], [("zefilhoa", "zenetob")], [], [])
+		assert m.applyDiff(d) == d
+		assert m.getNode("zefilhoa").getParentIds() == ["zeroot", "zenetob"]
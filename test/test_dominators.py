@@ -0,0 +1,54 @@
+
+import pytest
+
+from graphinet.graphinet import BaseGraphNode, MissingNodeIDsError
+from graphinet.dominators import DominatorTree
+
+def bruteDominates(p_dag, p_d, p_n):
+	"p_d dominates p_n if p_n is unreachable from the roots once p_d is taken out"
+	if p_d == p_n:
+		return True
+	seen = set()
+	stack = [r for r in p_dag.rootids if r != p_d]
+	while len(stack) > 0:
+		ident = stack.pop()
+		if ident in seen:
+			continue
+		seen.add(ident)
+		stack.extend(c for c in p_dag.getNode(ident).getChildrenIds() if c != p_d)
+	return not p_n in seen
+
+class TestClass:
+
+	def test_idom(self, prepared_dag):
+		dt = DominatorTree(prepared_dag)
+		assert dt.immediateDominator("zeroot") is None
+		assert dt.immediateDominator("zefilhoa") == "zeroot"
+		assert dt.immediateDominator("zenetob") == "zeroot"
+		assert dt.immediateDominator("zbisenetoc") == "zenetob"
+		assert dt.dominators("zbisenetob") == ["zenetob", "zeroot"]
+		with pytest.raises(MissingNodeIDsError):
+			dt.immediateDominator("xafs")
+
+	def test_subtree(self, prepared_dag):
+		dt = DominatorTree(prepared_dag)
+		assert set(dt.dominatedSubtree("zenetob")) == set(["zenetob", "zbisenetob", "zbisenetoc"])
+		assert dt.dominatedSubtree("zefilhoa") == ["zefilhoa"]
+		assert len(dt.dominatedSubtree("zeroot")) == 6
+
+	def test_superroot(self, prepared_dag):
+		prepared_dag.addNode(BaseGraphNode(ident="outro"))
+		prepared_dag.addEdge("outro", "zenetob")
+		dt = DominatorTree(prepared_dag)
+		assert dt.immediateDominator("zenetob") is None
+		assert set(dt.getChildren(None)) == set(["zeroot", "outro", "zenetob"])
+		for d in prepared_dag.nodes.keys():
+			for n in prepared_dag.nodes.keys():
+				assert dt.dominates(d, n) == bruteDominates(prepared_dag, d, n)
+
+	def test_postdom(self, prepared_dag):
+		pdt = DominatorTree(prepared_dag, postdominators=True)
+		assert pdt.immediateDominator("zeroot") == "zenetob"
+		assert pdt.immediateDominator("zefilhob") == "zenetob"
+		assert pdt.immediateDominator("zenetob") is None
+		assert pdt.immediateDominator("zbisenetob") is None
@@ -0,0 +1,57 @@
+
+import pytest
+
+from graphinet.graphinet import BaseGraphNode
+from graphinet.diagramming import BaseLayout, OuterRim, Pt
+from graphinet.layoutcache import LayoutCache, funcNamespace
+
+def makeLayout(p_rim):
+	bl = BaseLayout(1000, 800)
+	bl.setOuterRim(OuterRim(all=p_rim))
+	bl.addQuantizedXAxis(2).setIdentValuesDomain()
+	bl.addQuantizedYAxis(2).setIdentValuesDomain()
+	return bl
+
+def simpleLayout(p_dag, p_layout):
+	simpleLayout.calls += 1
+	return {"zeroot": p_layout.getPosition(Pt(0, 0), fromquantile=True),
+		"zefilhoa": p_layout.getPosition(Pt(0, 1), fromquantile=True),
+		"zefilhob": p_layout.getPosition(Pt(1, 1), fromquantile=True)}
+
+class TestClass:
+
+	def test_memory(self, prepared_dag):
+		simpleLayout.calls = 0
+		lc = LayoutCache(maxsize=2)
+		first = lc.getOrCompute(prepared_dag, makeLayout(10), simpleLayout)
+		assert lc.getOrCompute(prepared_dag, makeLayout(10), simpleLayout) == first
+		assert simpleLayout.calls == 1
+		lc.getOrCompute(prepared_dag, makeLayout(20), simpleLayout)
+		assert simpleLayout.calls == 2
+		prepared_dag.addNode(BaseGraphNode(ident="novo", parentids=["zefilhoa"]))
+		assert lc.get(prepared_dag, makeLayout(10)) is None
+		lc.getOrCompute(prepared_dag, makeLayout(10), simpleLayout)
+		# LRU evicted the oldest entry
+		assert len(lc) == 2
+		assert lc.hits == 1
+
+	def test_disk(self, prepared_dag, tmp_path):
+		simpleLayout.calls = 0
+		lc = LayoutCache(cachedir=str(tmp_path))
+		first = lc.getOrCompute(prepared_dag, makeLayout(10), simpleLayout)
+		other = LayoutCache(cachedir=str(tmp_path))
+		assert other.getOrCompute(prepared_dag, makeLayout(10), simpleLayout) == first
+		assert simpleLayout.calls == 1
+
+	def test_namespace(self, prepared_dag):
+		simpleLayout.calls = 0
+		def otherLayout(p_dag, p_layout):
+			return {ident: Pt(0, 0) for ident in p_dag.nodes}
+		lc = LayoutCache()
+		first = lc.getOrCompute(prepared_dag, makeLayout(10), simpleLayout)
+		# another layout function over the same graph and layout is not served the first one's positions
+		assert lc.getOrCompute(prepared_dag, makeLayout(10), otherLayout) != first
+		assert lc.get(prepared_dag, makeLayout(10), namespace=funcNamespace(simpleLayout)) == first
+		assert lc.getOrCompute(prepared_dag, makeLayout(10), simpleLayout, namespace="simple-v2") == first
+		assert simpleLayout.calls == 2
+		assert len(lc) == 3
@@ -0,0 +1,66 @@
+
+import random
+import pytest
+
+from graphinet.graphinet import BaseGraphNode
+from graphinet.diagramming import Pt
+from graphinet.packing import skylinePack, layeredComponentLayout, parallelLayout
+
+@pytest.fixture()
+def prepared_dag(prepared_dag):
+	for idx in range(5):
+		prepared_dag.addNode(BaseGraphNode(ident=f"outro{idx}"))
+		prepared_dag.addNode(BaseGraphNode(ident=f"outrofilho{idx}", parentids=[f"outro{idx}"]))
+	yield prepared_dag
+
+def overlaps(p_a, p_asz, p_b, p_bsz):
+	return p_a.x < p_b.x + p_bsz[0] and p_b.x < p_a.x + p_asz[0] and \
+		p_a.y < p_b.y + p_bsz[1] and p_b.y < p_a.y + p_asz[1]
+
+class TestClass:
+
+	def test_skyline(self):
+		rnd = random.Random(7)
+		sizes = [(rnd.randint(1, 30), rnd.randint(1, 30)) for _i in range(60)]
+		offsets, width, height = skylinePack(sizes, binwidth=100)
+		assert width <= 100
+		for i in range(len(sizes)):
+			assert offsets[i].x + sizes[i][0] <= 100
+			assert offsets[i].y + sizes[i][1] <= height
+			for j in range(i+1, len(sizes)):
+				assert not overlaps(offsets[i], sizes[i], offsets[j], sizes[j])
+		assert skylinePack([]) == ([], 0, 0)
+
+	def test_components(self, prepared_dag):
+		comps = prepared_dag.weaklyConnectedComponents()
+		assert len(comps) == 6
+		assert set(comps[0]) == set(["zeroot", "zefilhoa", "zefilhob", "zenetob", "zbisenetob", "zbisenetoc"])
+
+	def test_layered(self, prepared_dag):
+		comp = prepared_dag.weaklyConnectedComponents()[0]
+		positions, bl = layeredComponentLayout({ident: prepared_dag.getNode(ident).getParentIds() for ident in comp})
+		assert bl.getDims() == (100, 180)
+		assert positions["zeroot"] == Pt(30, 30)
+		assert positions["zefilhoa"].y == positions["zefilhob"].y == 70
+		assert positions["zenetob"] == Pt(30, 110)
+
+	@pytest.mark.parametrize("maxworkers", [1, 2])
+	def test_parallel(self, prepared_dag, maxworkers):
+		pl = parallelLayout(prepared_dag, maxworkers=maxworkers, chunksize=2)
+		assert len(pl.layouts) == 6
+		assert len(pl.positions) == len(prepared_dag.nodes)
+		for i in range(len(pl.layouts)):
+			a = pl.layouts[i]
+			assert a.origin.x + a.width <= pl.canvas.width and a.origin.y + a.height <= pl.canvas.height
+			for ident in pl.components[i]:
+				pt = pl.positions[ident]
+				assert a.origin.x <= pt.x <= a.origin.x + a.width
+				assert a.origin.y <= pt.y <= a.origin.y + a.height
+			for j in range(i+1, len(pl.layouts)):
+				b = pl.layouts[j]
+				assert not overlaps(a.origin, a.getDims(), b.origin, b.getDims())
+		# sub-layouts keep their rim and quantized axes, projecting straight to packed positions
+		main = pl.layouts[0]
+		assert main.outer_rim.l == 10
+		assert main.getPosition(Pt(0, 0), fromquantile=True) == pl.positions["zeroot"]
+		assert main.getPosition(Pt(0, 2), fromquantile=True) == pl.positions["zenetob"]
@@ -0,0 +1,60 @@
+
+import itertools
+import pytest
+
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode, MissingNodeIDsError
+from graphinet.paths import pathCounts, countPaths, kShortestPaths
+
+@pytest.fixture()
+def prepared_dag(prepared_dag):
+	prepared_dag.addEdge("zeroot", "zenetob")
+	yield prepared_dag
+
+def ladder(p_n):
+	"Chain of diamonds, 2**p_n paths from top to bottom"
+	m = DirectedAciclicGraph()
+	m.addNode(BaseGraphNode(ident=0))
+	for i in range(p_n):
+		m.addNode(BaseGraphNode(ident=f"a{i}", parentids=[i]))
+		m.addNode(BaseGraphNode(ident=f"b{i}", parentids=[i]))
+		m.addNode(BaseGraphNode(ident=i+1, parentids=[f"a{i}", f"b{i}"]))
+	return m
+
+class TestClass:
+
+	def test_counts(self, prepared_dag):
+		counts = pathCounts(prepared_dag)
+		assert counts["zeroot"] == 1
+		assert counts["zenetob"] == 3
+		assert counts["zbisenetoc"] == 3
+		assert countPaths(prepared_dag, "zbisenetob", source="zefilhoa") == 1
+		assert countPaths(prepared_dag, "zefilhoa", source="zefilhob") == 0
+		with pytest.raises(MissingNodeIDsError):
+			countPaths(prepared_dag, "xafs")
+
+	def test_bigcounts(self):
+		m = ladder(80)
+		assert countPaths(m, 80) == 2 ** 80
+		assert countPaths(m, 80, modulus=1000003) == pow(2, 80, 1000003)
+
+	def test_kshortest(self, prepared_dag):
+		paths = list(kShortestPaths(prepared_dag, "zeroot", "zbisenetob"))
+		assert paths[0] == (2, ["zeroot", "zenetob", "zbisenetob"])
+		assert [c for c, _p in paths] == [2, 3, 3]
+		assert list(kShortestPaths(prepared_dag, "zefilhoa", "zefilhob")) == []
+
+	def test_weighted(self, prepared_dag):
+		costs = {"zefilhoa": 1, "zefilhob": 2, "zenetob": 10}
+		def w(p_from, p_to):
+			if p_from.ident == "zeroot" and p_to.ident == "zenetob":
+				return 50
+			return costs.get(p_to.ident, 1)
+		paths = list(kShortestPaths(prepared_dag, "zeroot", "zenetob", weight=w))
+		assert paths == [(11, ["zeroot", "zefilhoa", "zenetob"]), (12, ["zeroot", "zefilhob", "zenetob"]), (50, ["zeroot", "zenetob"])]
+
+	def test_lazy(self):
+		m = ladder(200)
+		first = list(itertools.islice(kShortestPaths(m, 0, 200), 5))
+		assert len(first) == 5
+		assert all(c == 400 for c, _p in first)
+		assert len(set(tuple(p) for _c, p in first)) == 5
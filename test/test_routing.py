@@ -0,0 +1,93 @@
+
+import pytest
+
+from graphinet.diagramming import Pt, Rect
+from graphinet.routing import OrthogonalRouter, MissingObstacleError
+
+def crossesBox(p_path, p_rect):
+	for a, b in zip(p_path[:-1], p_path[1:]):
+		if a.y == b.y and p_rect.miny < a.y < p_rect.maxy and min(a.x, b.x) < p_rect.maxx and max(a.x, b.x) > p_rect.minx:
+			return True
+		if a.x == b.x and p_rect.minx < a.x < p_rect.maxx and min(a.y, b.y) < p_rect.maxy and max(a.y, b.y) > p_rect.miny:
+			return True
+	return False
+
+def isOrthogonal(p_path):
+	return all(a.x == b.x or a.y == b.y for a, b in zip(p_path[:-1], p_path[1:]))
+
+@pytest.fixture()
+def prepared_router():
+	r = OrthogonalRouter(margin=5)
+	r.setObstacle("a", Rect(0, 0, 20, 20))
+	r.setObstacle("b", Rect(200, 0, 220, 20))
+	r.setObstacle("wall", Rect(90, -40, 130, 60))
+	r.setObstacle("far", Rect(-500, 500, -480, 520))
+	yield r
+
+class TestClass:
+
+	def test_avoid(self, prepared_router):
+		path = prepared_router.route("a", "b")
+		assert path[0] == Pt(10, 10) and path[-1] == Pt(210, 10)
+		assert isOrthogonal(path)
+		assert not crossesBox(path, prepared_router.obstacles["wall"])
+		assert len(path) == 4
+
+	def test_missing(self, prepared_router):
+		with pytest.raises(MissingObstacleError):
+			prepared_router.route("a", "zzz")
+
+	def test_incremental(self, prepared_router):
+		prepared_router.addEdge("a", "b")
+		prepared_router.addEdge("a", "far")
+		assert prepared_router.reroute() == 2
+		assert prepared_router.getDirty() == []
+		# moving the wall only touches the corridor of a -> b
+		prepared_router.setObstacle("wall", Rect(90, 100, 130, 140))
+		assert prepared_router.getDirty() == [("a", "b")]
+		prepared_router.reroute()
+		assert prepared_router.getRoute("a", "b") == [Pt(10, 10), Pt(210, 10)]
+		# moving an endpoint always re-routes its edges
+		prepared_router.setObstacle("far", Rect(-600, 600, -580, 620))
+		assert ("a", "far") in prepared_router.getDirty()
+
+	def test_cache(self, prepared_router):
+		path = prepared_router.route("a", "b")
+		prepared_router.removeEdge("a", "b")
+		assert len(prepared_router._cache) == 1
+		assert prepared_router.route("a", "b") == path
+		assert len(prepared_router._cache) == 1
+
+	def test_cache_size(self):
+		r = OrthogonalRouter(margin=5, cachesize=2)
+		for i in range(4):
+			r.setObstacle(i, Rect(i*100, 0, i*100+20, 20))
+		first = r.route(0, 1)
+		r.route(1, 2)
+		r.route(0, 1)
+		r.route(2, 3)
+		# least recently used is dropped, the (0, 1) hit kept it alive
+		assert len(r._cache) == 2
+		assert first in r._cache.values()
+		assert not r.getRoute(1, 2) in r._cache.values()
+
+	def test_grid(self):
+		r = OrthogonalRouter(margin=5)
+		boxes = {(i, j): Rect(i*100, j*100, i*100+40, j*100+40) for i in range(8) for j in range(8)}
+		for ident, rect in boxes.items():
+			r.setObstacle(ident, rect)
+		path = r.route((0, 0), (7, 7))
+		assert isOrthogonal(path)
+		for ident, rect in boxes.items():
+			if not ident in ((0, 0), (7, 7)):
+				assert not crossesBox(path, rect)
+
+	def test_share(self):
+		r = OrthogonalRouter(margin=5, share_factor=0.5)
+		r.setObstacle("a", Rect(0, 0, 20, 20))
+		r.setObstacle("b", Rect(200, 200, 220, 220))
+		r.setObstacle("c", Rect(0, 30, 20, 50))
+		first = r.route("a", "b")
+		assert first == [Pt(10, 10), Pt(210, 10), Pt(210, 210)]
+		# equal length and bends either way, the second route joins the x=210 channel left by the first one
+		assert r.route("c", "b") == [Pt(10, 40), Pt(210, 40), Pt(210, 210)]
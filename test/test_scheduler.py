@@ -0,0 +1,91 @@
+
+import time
+import asyncio
+import threading
+import pytest
+
+from graphinet.graphinet import BaseGraphNode
+from graphinet.scheduler import DAGExecutor, ExecutorType, TaskState
+
+@pytest.fixture()
+def prepared_dag(prepared_dag):
+	prepared_dag.addNode(BaseGraphNode(ident="outro"))
+	yield prepared_dag
+
+def identUpper(p_node):
+	return p_node.ident.upper()
+
+class Recorder(object):
+	def __init__(self, p_dag, failon=None):
+		self.dag = p_dag
+		self.failon = failon
+		self.finished = []
+		self.lock = threading.Lock()
+	def __call__(self, p_node):
+		with self.lock:
+			for pid in p_node.getParentIds():
+				assert pid in self.finished
+		if p_node.ident == self.failon:
+			raise ValueError(p_node.ident)
+		time.sleep(0.001)
+		with self.lock:
+			self.finished.append(p_node.ident)
+		return p_node.ident
+
+class TestClass:
+
+	def test_topo(self, prepared_dag):
+		order = prepared_dag.topologicalOrder()
+		assert len(order) == 7
+		for ident in order:
+			for pid in prepared_dag.getNode(ident).getParentIds():
+				assert order.index(pid) < order.index(ident)
+
+	def test_threads(self, prepared_dag):
+		rec = Recorder(prepared_dag)
+		res = DAGExecutor(prepared_dag, rec, maxworkers=3).run()
+		assert len(res) == 7
+		assert all(r.state == TaskState.DONE for r in res.values())
+		assert res["zenetob"].value == "zenetob"
+
+	def test_critical_path(self, prepared_dag):
+		rec = Recorder(prepared_dag)
+		DAGExecutor(prepared_dag, rec, maxworkers=1).run()
+		# the long chain under zeroot is started before the lone outro node
+		assert rec.finished[0] == "zeroot"
+		assert rec.finished[-1] == "outro"
+
+	def test_failure(self, prepared_dag):
+		res = DAGExecutor(prepared_dag, Recorder(prepared_dag, failon="zefilhoa"), maxworkers=2).run()
+		assert res["zefilhoa"].state == TaskState.FAILED
+		assert isinstance(res["zefilhoa"].error, ValueError)
+		for ident in ("zenetob", "zbisenetob", "zbisenetoc"):
+			assert res[ident].state == TaskState.SKIPPED
+		assert res["zefilhob"].state == TaskState.DONE
+		assert res["outro"].state == TaskState.DONE
+
+	def test_cancel(self, prepared_dag):
+		def cancelling(p_node):
+			if p_node.ident == "zeroot":
+				ex.cancel()
+			return p_node.ident
+		ex = DAGExecutor(prepared_dag, cancelling, maxworkers=1)
+		res = ex.run()
+		assert res["zeroot"].state == TaskState.DONE
+		assert res["zbisenetoc"].state == TaskState.CANCELLED
+
+	def test_process(self, prepared_dag):
+		res = DAGExecutor(prepared_dag, identUpper, executortype=ExecutorType.PROCESS, maxworkers=2).run()
+		assert res["zenetob"].value == "ZENETOB"
+
+	def test_asyncio(self, prepared_dag):
+		order = []
+		async def coro(p_node):
+			await asyncio.sleep(0)
+			order.append(p_node.ident)
+			return len(p_node.ident)
+		res = DAGExecutor(prepared_dag, coro, executortype=ExecutorType.ASYNCIO, maxworkers=2).run()
+		assert res["outro"].value == 5
+		assert order.index("zenetob") > order.index("zefilhob")
+		res = DAGExecutor(prepared_dag, identUpper, executortype=ExecutorType.ASYNCIO).run()
+		assert res["zeroot"].value == "ZEROOT"
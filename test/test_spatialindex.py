@@ -0,0 +1,60 @@
+
+import pytest
+
+from graphinet.diagramming import BaseLayout, OuterRim, Pt, Rect
+from graphinet.spatialindex import GridSpatialIndex, InvalidCellSize
+
+@pytest.fixture()
+def prepared_index():
+	bl = BaseLayout(1000, 800)
+	bl.setOuterRim(OuterRim(all=20))
+	xa = bl.addQuantizedXAxis(10)
+	xa.setIdentValuesDomain()
+	ya = bl.addQuantizedYAxis(4, invert=True)
+	ya.setIdentValuesDomain()
+	vals = {
+		"a": Pt(0,0), "b": Pt(1,1), "c": Pt(2,1), "d": Pt(3,2), "e": Pt(4,0),
+		"f": Pt(5,1), "g": Pt(6,1), "h": Pt(7,2), "i": Pt(8,2), "j": Pt(9,3)
+	}
+	yield GridSpatialIndex.fromLayout(bl, vals, fromquantile=True, doraise=True)
+
+class TestClass:
+
+	def test_build(self, prepared_index):
+		assert len(prepared_index) == 10
+		assert prepared_index.cellsize == 96
+		assert prepared_index.getPosition("a") == (68, 685)
+
+	def test_invalid(self):
+		with pytest.raises(InvalidCellSize):
+			GridSpatialIndex(0)
+
+	def test_point(self, prepared_index):
+		assert prepared_index.pointQuery(Pt(70, 690), tolerance=10) == ["a"]
+		assert prepared_index.pointQuery(Pt(70, 600), tolerance=10) == []
+
+	def test_rect(self, prepared_index):
+		assert set(prepared_index.rectQuery(Rect(0, 0, 500, 800))) == set(["a", "b", "c", "d", "e"])
+		assert set(prepared_index.rectQuery(Rect(0, 0, 2000, 2000))) == set("abcdefghij")
+
+	def test_nearest(self, prepared_index):
+		allpts = prepared_index.positions
+		target = Pt(500, 100)
+		expected = sorted(allpts.keys(), key=lambda k: (allpts[k].x-target.x)**2 + (allpts[k].y-target.y)**2)
+		assert [ident for _d, ident in prepared_index.nearest(target, k=3)] == expected[:3]
+		assert len(prepared_index.nearest(target, k=50)) == 10
+
+	def test_nearest_far(self, prepared_index):
+		# far outside the occupied cells, search starts at the bounds instead of walking empty rings
+		allpts = prepared_index.positions
+		for target in (Pt(-1e9, 3e8), Pt(5e8, 5e8), Pt(400, -1e9)):
+			expected = sorted(allpts.keys(), key=lambda k: (allpts[k].x-target.x)**2 + (allpts[k].y-target.y)**2)
+			assert [ident for _d, ident in prepared_index.nearest(target, k=4)] == expected[:4]
+
+	def test_move(self, prepared_index):
+		prepared_index.move("a", Pt(900, 50))
+		assert prepared_index.pointQuery(Pt(70, 690), tolerance=10) == []
+		assert prepared_index.nearest(Pt(905, 45))[0][1] == "a"
+		assert prepared_index.remove("a")
+		assert not "a" in prepared_index
+		assert len(prepared_index) == 9
@@ -0,0 +1,129 @@
+
+import os
+import pytest
+
+from graphinet.graphinet import DirectedAciclicGraph, BaseGraphNode
+from graphinet.diagramming import BaseLayout, Pt, Rect
+from graphinet.tiling import TiledDiagram, InvalidZoomLevel, segmentIntersectsRect
+
+@pytest.fixture()
+def prepared_tiles(prepared_dag):
+	m = prepared_dag
+	# zbisenetob/zbisenetoc get no position, they and their edges are left out of the tiles
+	bl = BaseLayout(1000, 1000)
+	bl.basicLinearIdentInit()
+	vals = {"zeroot": Pt(100, 100), "zefilhoa": Pt(100, 900), "zefilhob": Pt(300, 400), "zenetob": Pt(900, 900)}
+	yield m, TiledDiagram.fromGraph(m, bl, vals, maxzoom=3, aggregate_threshold=3, aggregate_bins=2)
+
+class TestClass:
+
+	def test_segment(self):
+		assert segmentIntersectsRect(Pt(0, 0), Pt(10, 10), Rect(4, 4, 6, 6))
+		assert not segmentIntersectsRect(Pt(0, 10), Pt(3, 10), Rect(4, 4, 6, 6))
+
+	def test_zoom0_aggregates(self, prepared_tiles):
+		_m, td = prepared_tiles
+		tile = td.getTile(0, 0, 0)
+		assert tile.nodes == []
+		assert sum(a.count for a in tile.aggregates) == 4
+		assert len(tile.aggregates) == 3
+
+	def test_culling(self, prepared_tiles):
+		_m, td = prepared_tiles
+		tile = td.getTile(1, 0, 0)
+		assert set(tile.nodes) == set(["zeroot", "zefilhob"])
+		assert set(tile.edges) == set([("zeroot", "zefilhoa"), ("zeroot", "zefilhob"), ("zefilhob", "zenetob")])
+		tile = td.getTile(1, 1, 0)
+		assert tile.nodes == [] and tile.edges == []
+		tile = td.getTile(1, 1, 1)
+		assert tile.nodes == ["zenetob"]
+		assert set(tile.edges) == set([("zefilhoa", "zenetob"), ("zefilhob", "zenetob")])
+
+	def test_viewport(self, prepared_tiles):
+		_m, td = prepared_tiles
+		assert td.tilesForViewport(2, Rect(300, 300, 600, 400)) == [(1, 1), (2, 1)]
+		assert len(td.getViewport(3, Rect(-100, -100, 5000, 5000))) == 64
+		with pytest.raises(InvalidZoomLevel):
+			td.getTile(4, 0, 0)
+
+	def test_diskcache(self, prepared_tiles, tmp_path):
+		m, td = prepared_tiles
+		td.cachedir = str(tmp_path)
+		tile = td.getTile(1, 0, 0)
+		assert os.path.exists(os.path.join(str(tmp_path), td.cacheKey(), "1", "0_0.pickle"))
+		td._tiles.clear()
+		assert td.getTile(1, 0, 0) == tile
+		td.setVersion(m.version + 1)
+		assert len(td._tiles) == 0
+
+	def test_diskcache_graphs(self, prepared_tiles, tmp_path):
+		# another graph, with as many changes, must not be served the first one's tiles
+		_m, td = prepared_tiles
+		td.cachedir = str(tmp_path)
+		td.getTile(0, 0, 0)
+		other = DirectedAciclicGraph()
+		for ident in ("x", "y", "z", "w", "u", "v"):
+			other.addNode(BaseGraphNode(ident=ident))
+		bl = BaseLayout(1000, 1000)
+		bl.basicLinearIdentInit()
+		vals = {"x": Pt(900, 900), "y": Pt(100, 100), "z": Pt(300, 400), "w": Pt(100, 900)}
+		otd = TiledDiagram.fromGraph(other, bl, vals, maxzoom=3, aggregate_threshold=3, aggregate_bins=2, cachedir=str(tmp_path))
+		assert otd.version == td.version
+		assert otd.cacheKey() != td.cacheKey()
+		tile = otd.getTile(1, 1, 1)
+		assert tile.nodes == ["x"]
+		assert tile.edges == []
+
+	def test_move(self, prepared_tiles):
+		_m, td = prepared_tiles
+		keep = td.getTile(1, 1, 0)
+		td.getTile(1, 1, 1)
+		key = td.cacheKey()
+		td.moveNode("zenetob", Pt(900, 100))
+		assert td.cacheKey() == key
+		# the tile the node left and the one it entered are rebuilt, others kept
+		assert not (1, 1, 1) in td._tiles
+		assert not (1, 1, 0) in td._tiles
+		assert td.getTile(1, 1, 1).nodes == []
+		tile = td.getTile(1, 1, 0)
+		assert tile.nodes == ["zenetob"]
+		assert set(tile.edges) == set([("zefilhoa", "zenetob"), ("zefilhob", "zenetob")])
+		assert not keep is tile
+		# edge culling follows the new segments
+		tile = td.getTile(2, 3, 3)
+		assert tile.nodes == [] and tile.edges == []
+		tile = td.getTile(2, 3, 0)
+		assert tile.nodes == ["zenetob"]
+
+	def test_add_edge(self, prepared_tiles):
+		_m, td = prepared_tiles
+		td.getTile(1, 0, 0)
+		td.getTile(1, 1, 1)
+		td.getTile(1, 0, 1)
+		td.addEdge("zeroot", "zenetob")
+		# the diagonal crosses (1,0,0) and (1,1,1), and touches (1,0,1) only at its corner
+		assert not (1, 0, 0) in td._tiles
+		assert not (1, 1, 1) in td._tiles
+		assert ("zeroot", "zenetob") in td.getTile(1, 1, 1).edges
+		assert ("zeroot", "zenetob") in td.getTile(1, 0, 0).edges
+
+	def test_diskcache_move(self, prepared_tiles, tmp_path):
+		# moves keep the disk key, only the touched tiles get new files
+		m, td = prepared_tiles
+		td.cachedir = str(tmp_path)
+		keep = td.getTile(1, 1, 0)
+		td.getTile(1, 0, 1)
+		td.moveNode("zefilhob", Pt(350, 450))
+		assert td._tilePath(1, 1, 0).endswith("1_0.pickle")
+		assert td._tilePath(1, 0, 0) != os.path.join(str(tmp_path), td.cacheKey(), "1", "0_0.pickle")
+		td._tiles.clear()
+		assert td.getTile(1, 1, 0) == keep
+		assert "zefilhob" in td.getTile(1, 0, 0).nodes
+		# a fresh diagram over the same unmoved content still reads the untouched tiles
+		bl = BaseLayout(1000, 1000)
+		bl.basicLinearIdentInit()
+		vals = {"zeroot": Pt(100, 100), "zefilhoa": Pt(100, 900), "zefilhob": Pt(300, 400), "zenetob": Pt(900, 900)}
+		other = TiledDiagram.fromGraph(m, bl, vals, maxzoom=3, aggregate_threshold=3, aggregate_bins=2, cachedir=str(tmp_path))
+		assert other.cacheKey() == td.cacheKey()
+		assert other._tilePath(1, 0, 0) == os.path.join(str(tmp_path), td.cacheKey(), "1", "0_0.pickle")
+		assert other._tilePath(1, 1, 0) == td._tilePath(1, 1, 0)